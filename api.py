@@ -0,0 +1,152 @@
+import asyncio
+import json
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from assistant import (
+    GEMINI_MODEL, SYSTEM_PROMPT, Turn, get_session, new_session, save_session, within_rate_limit,
+)
+from faq import get_faq_matcher
+from languages import LANGUAGE_NAMES
+from message_store import memory_report
+from response_cache import get_response_cache
+from translation import get_translation_service
+
+# ----------------------------
+# Headless Chat API
+# ----------------------------
+# The same pipeline as the Streamlit app, as a small ASGI service for other
+# intranet tools and for load testing:
+#
+#   uvicorn api:app --port 8000
+#
+#   POST /sessions                      -> {"session": token}
+#   GET  /session                       -> {"session": token, "messages": [...]}
+#        (token in the X-Session-Token header)
+#   POST /chat  {"message", "language", "session"?}
+#        -> text/event-stream: "session", then "delta" events, then "done"
+#           (or "error")
+#   GET  /health
+#   GET  /metrics                       -> FAQ, response and translation cache counters,
+#                                          session memory held by this process
+#
+# A token reads the whole transcript, so it travels in a header or the request
+# body, never in a URL path that access logs and proxies record.
+#
+# Session, cache and store calls block, so endpoints that make them are plain
+# functions (run in Starlette's threadpool) or hand them to the threadpool.
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def health(request):
+    return JSONResponse({"status": "ok"})
+
+
+def metrics(request):
+    return JSONResponse({
+        "faq": get_faq_matcher().stats(),
+        "response_cache": get_response_cache(GEMINI_MODEL, SYSTEM_PROMPT).stats(),
+        "translation": get_translation_service().stats(),
+        "session_memory": memory_report(per_session=False),
+    })
+
+
+def create_session(request):
+    return JSONResponse({"session": new_session().token}, status_code=201)
+
+
+def read_session(request):
+    session = get_session(request.headers.get("x-session-token"))
+    if session is None:
+        return JSONResponse({"error": "unknown session"}, status_code=404)
+    messages = [
+        {"role": msg.role, "content": msg.content}
+        for msg in session.messages[1:]
+    ]
+    return JSONResponse({"session": session.token, "messages": messages})
+
+
+async def chat(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        return JSONResponse({"error": "body must be JSON"}, status_code=400)
+
+    if not isinstance(body, dict):
+        return JSONResponse({"error": "body must be a JSON object"}, status_code=400)
+    message = body.get("message")
+    language = body.get("language", "en")
+    token = body.get("session")
+    if not isinstance(message, str) or not message.strip():
+        return JSONResponse({"error": "message is required"}, status_code=400)
+    if not isinstance(language, str) or language not in LANGUAGE_NAMES:
+        return JSONResponse({"error": f"unsupported language: {language}"}, status_code=400)
+    if token is not None and not isinstance(token, str):
+        return JSONResponse({"error": "session must be a string"}, status_code=400)
+    message = message.strip()
+
+    session = await run_in_threadpool(get_session, token) if token else await run_in_threadpool(new_session)
+    if session is None:
+        return JSONResponse({"error": "unknown session"}, status_code=404)
+    if not await run_in_threadpool(within_rate_limit, session):
+        return JSONResponse({"error": "rate limit exceeded"}, status_code=429)
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def emit(event):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+        except RuntimeError:
+            pass  # the event loop has shut down
+
+    # The turn runs in a worker thread, so the blocking Gemini and translator
+    # calls never stall the event loop, and it runs to the end even if the
+    # client disconnects, so the user's message and the reply are saved.
+    def run_turn():
+        try:
+            turn = Turn(session, message, language)
+            for piece in turn:
+                emit(_sse("delta", {"text": piece}))
+            turn.finish()
+        except Exception as e:
+            save_session(session)
+            emit(_sse("error", {"error": str(e)}))
+        else:
+            emit(_sse("done", {
+                "reply": turn.reply,
+                "prompt_stats": turn.prompt_stats,
+                "timings": turn.timings,
+                "cached": turn.cache_hit,
+                "faq": turn.faq.name if turn.faq else None,
+            }))
+        finally:
+            emit(None)
+
+    loop.run_in_executor(None, run_turn)
+
+    async def events():
+        yield _sse("session", {"session": session.token})
+        while (event := await queue.get()) is not None:
+            yield event
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+app = Starlette(routes=[
+    Route("/health", health),
+    Route("/metrics", metrics),
+    Route("/sessions", create_session, methods=["POST"]),
+    Route("/session", read_session),
+    Route("/chat", chat, methods=["POST"]),
+])
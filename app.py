@@ -1,20 +1,18 @@
-import streamlit as st
-from deep_translator import GoogleTranslator
-from google import genai
-from google.genai import types
-from dotenv import load_dotenv
 import os
 
+import streamlit as st
+
+from assistant import QUICK_QUESTIONS, Turn, get_session, new_session, save_session, within_rate_limit
+from clients import get_gemini_client
+from streaming import ThrottledRenderer
+from ui_strings import quick_question, ui_text
+
 # ----------------------------
 # Load API Key
 # ----------------------------
-load_dotenv('.env.txt')
-
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY is not set.")
-
-client = genai.Client(api_key=GEMINI_API_KEY)
+# The client (and its connection pool) is created once per process and shared
+# by every session and rerun; creating it here fails fast without a key.
+get_gemini_client()
 
 # ----------------------------
 # Page Config
@@ -24,14 +22,8 @@ st.set_page_config(page_title="Ombuds AI Support Assistant", layout="centered",
 UNHCR_LOGO = "https://www.unhcr.org/themes/custom/project/logo.svg"
 
 # ----------------------------
-# Language Translator
+# Language Picker
 # ----------------------------
-def translate(text, target_lang):
-    try:
-        return GoogleTranslator(source="auto", target=target_lang).translate(text)
-    except:
-        return text  # fallback
-
 language_options = {
     "English": "en",
     "Arabic": "ar",
@@ -41,39 +33,52 @@ language_options = {
     "Ukrainian": "uk"
 }
 
-selected_language = st.selectbox("Select your preferred language:", list(language_options.keys()))
+# The picker's own label follows the language chosen on the previous run;
+# every other string comes from the precompiled catalog (ui_strings.py).
+previous_lang = language_options.get(st.session_state.get("selected_language"), "en")
+selected_language = st.selectbox(
+    ui_text(previous_lang, "language_prompt"), list(language_options.keys()), key="selected_language"
+)
 target_lang = language_options[selected_language]
 
 # ----------------------------
 # Sidebar
 # ----------------------------
 st.sidebar.image(UNHCR_LOGO, use_container_width=True)
-st.sidebar.markdown("""
-### 🌍 Ombudsman and Mediator
+YEAR_IN_REVIEW_REPORTS = {
+    2024: "https://intranet.unhcr.org/content/dam/unhcr/intranet/organization-leadership/ombudsman/documents/english/annual-reports/Year%20In%20Review_2024_EN.pdf",
+    2023: "https://intranet.unhcr.org/content/dam/unhcr/intranet/organization-leadership/ombudsman/documents/english/annual-reports/Ombudsman%20Year%20in%20Review%202023%20EN.pdf",
+    2022: "https://intranet.unhcr.org/content/dam/unhcr/intranet/organization-leadership/ombudsman/documents/english/annual-reports/Ombudsman%20Year%20in%20Review%202022%20EN.pdf",
+}
+
+reports = "\n".join(
+    f"- [{ui_text(target_lang, 'report_label', year=year)}]({url})"
+    for year, url in YEAR_IN_REVIEW_REPORTS.items()
+)
+st.sidebar.markdown(f"""
+### 🌍 {ui_text(target_lang, "sidebar_title")}
 
-Your neutral guide for:  
-- Conflict resolution ⚖️  
-- Workplace fairness 🏢  
-- Support and guidance 💬  
+{ui_text(target_lang, "sidebar_intro")}  
+- {ui_text(target_lang, "sidebar_conflict")} ⚖️  
+- {ui_text(target_lang, "sidebar_fairness")} 🏢  
+- {ui_text(target_lang, "sidebar_support")} 💬  
 
-[Visit UNHCR Website →](https://www.unhcr.org/)  
-[Contact Office of Ombudsman and Mediator →](https://intranet.unhcr.org/en/about/office-of-the-ombudsman.html)
+[{ui_text(target_lang, "sidebar_website")} →](https://www.unhcr.org/)  
+[{ui_text(target_lang, "sidebar_contact")} →](https://intranet.unhcr.org/en/about/office-of-the-ombudsman.html)
 
 ---
 
-### 📑 Annual Reports and Publications
-Download the latest reports to learn more about our work:
-- [Year in Review 2024](https://intranet.unhcr.org/content/dam/unhcr/intranet/organization-leadership/ombudsman/documents/english/annual-reports/Year%20In%20Review_2024_EN.pdf)
-- [Year in Review 2023](https://intranet.unhcr.org/content/dam/unhcr/intranet/organization-leadership/ombudsman/documents/english/annual-reports/Ombudsman%20Year%20in%20Review%202023%20EN.pdf)
-- [Year in Review 2022](https://intranet.unhcr.org/content/dam/unhcr/intranet/organization-leadership/ombudsman/documents/english/annual-reports/Ombudsman%20Year%20in%20Review%202022%20EN.pdf)
+### 📑 {ui_text(target_lang, "reports_title")}
+{ui_text(target_lang, "reports_intro")}
+{reports}
 """)
 
 # ----------------------------
 # Header
 # ----------------------------
-st.markdown("""
-<h1 style='text-align:center;color:#005baa;'>🌟 Ombuds AI Support Assistant</h1>
-<p style='text-align:center;'>Welcome! I'm here to help prevent, reduce, and resolve workplace grievances within the UNHCR community.</p>
+st.markdown(f"""
+<h1 style='text-align:center;color:#005baa;'>🌟 {ui_text(target_lang, "header_title")}</h1>
+<p style='text-align:center;'>{ui_text(target_lang, "header_welcome")}</p>
 """, unsafe_allow_html=True)
 
 # st.markdown(
@@ -90,105 +95,126 @@ st.video("https://youtu.be/n0jQjX3WMNA")
 # ----------------------------
 # Initialize Chat History
 # ----------------------------
-if "messages" not in st.session_state:
-    st.session_state.messages = [
-        {
-            "role": "system",
-            "content": (
-                "You are a neutral and compassionate assistant named Yiyang for the "
-                "Ombudsman and Mediator Office of UNHCR. Your goal is to provide clear, "
-                "impartial, and helpful guidance on conflict resolution, workplace fairness, "
-                "and emotional support."
-            )
-        }
-    ]
+# The conversation (history plus rolling summary) lives in the process-wide
+# session manager and is evicted from memory while the tab sits idle. Its
+# token is a bearer secret for the whole transcript, so it is kept in this
+# tab's session state only, never in the URL (where it would end up in
+# browser history, bookmarks and shared links). To pick the conversation up
+# in another tab or after a restart, the user copies the resume code from
+# the sidebar and pastes it back.
+def current_session():
+    session = get_session(st.session_state.get("session_token"))
+    if session is None:
+        session = new_session()
+        st.session_state.session_token = session.token
+    return session
+
+def resume_session():
+    code = st.session_state.resume_code.strip()
+    st.session_state.resume_code = ""
+    if code and get_session(code) is not None:
+        st.session_state.session_token = code
+    elif code:
+        st.session_state.resume_failed = True
+
+# Links from before the token left the URL are not honoured, only cleaned up.
+if "session" in st.query_params:
+    del st.query_params["session"]
+
+with st.sidebar.expander(f"🔑 {ui_text(target_lang, 'resume_title')}"):
+    st.caption(ui_text(target_lang, "resume_intro"))
+    st.code(current_session().token, language=None)
+    st.text_input(ui_text(target_lang, "resume_input"), key="resume_code", type="password", on_change=resume_session)
+    if st.session_state.pop("resume_failed", False):
+        st.warning(ui_text(target_lang, "resume_unknown"))
 
 # ----------------------------
 # Quick Questions
 # ----------------------------
-quick_questions = {
-    "⚖️ How can I resolve a workplace conflict?": "How can I resolve a workplace conflict?",
-    "📝 What is the process for filing a grievance?": "What is the process for filing a grievance?",
-    "🤝 How can I mediate a disagreement?": "How can I mediate a disagreement?",
-    "📞 How can I access Ombudsman services?": "How can I access Ombudsman services?",
-    "💬 How do I receive emotional support at work?": "How do I receive emotional support at work?"
-}
-
-st.markdown("**Quick Questions:**")
-cols = st.columns(len(quick_questions))
-
-for i, (label, value) in enumerate(quick_questions.items()):
-    if cols[i].button(label):
-        st.session_state.prompt = value
+# Runs before the rerun the click triggers, so the click costs a single rerun.
+def ask_quick_question(question):
+    st.session_state.prompt = question
 
 # ----------------------------
-# Display Chat History
+# History Window
 # ----------------------------
-for msg in st.session_state.messages[1:]:
-    st.chat_message(msg["role"]).markdown(msg["content"])
+# Only the most recent messages are drawn on each rerun; older ones are paged
+# in on demand, so rerun cost does not grow with the length of the session.
+HISTORY_PAGE_SIZE = int(os.getenv("OMBUDS_HISTORY_PAGE_SIZE", "20"))
 
-# ----------------------------
-# User Input
-# ----------------------------
-user_input = st.chat_input("How can I help you today?")
+if "history_window" not in st.session_state:
+    st.session_state.history_window = HISTORY_PAGE_SIZE
 
-if "prompt" in st.session_state:
-    prompt = st.session_state.prompt
-    del st.session_state["prompt"]
-elif user_input:
-    prompt = user_input
-else:
-    prompt = None
-
-# ----------------------------
-# Convert Chat History → Prompt
-# ----------------------------
-def convert_history_to_prompt(messages):
-    system_instruction = None
-    dialogue = ""
-
-    for msg in messages:
-        if msg["role"] == "system":
-            system_instruction = msg["content"]
-        elif msg["role"] == "user":
-            dialogue += f"User: {msg['content']}\n"
-        elif msg["role"] == "assistant":
-            dialogue += f"Assistant: {msg['content']}\n"
-
-    return system_instruction, dialogue
+def show_earlier_messages():
+    st.session_state.history_window += HISTORY_PAGE_SIZE
 
 # ----------------------------
 # Chat Generation with Gemini
 # ----------------------------
-if prompt:
-    translated_input = translate(prompt, "en")
+def generate_reply(session, prompt, target_lang, canonical=None):
+    if not within_rate_limit(session):
+        st.warning(ui_text(target_lang, "rate_limited"))
+        return
 
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    turn = Turn(session, prompt, target_lang, canonical)
     st.chat_message("user").markdown(prompt)
 
     with st.chat_message("assistant"):
-        msg_placeholder = st.empty()
-        full_reply = ""
+        # Chunks are coalesced and rendered at most once per frame.
+        renderer = ThrottledRenderer(st.empty())
 
         try:
-            system_instruction, history_prompt = convert_history_to_prompt(st.session_state.messages)
-
-            # Gemini request
-            response_stream = client.models.generate_content_stream(
-                model="gemini-2.5-flash",
-                config=types.GenerateContentConfig(system_instruction=system_instruction),
-                contents=[history_prompt]  # MUST be a string, not dict/list
-            )
-
-            for chunk in response_stream:
-                if chunk.text:
-                    full_reply += chunk.text
-                    msg_placeholder.markdown(full_reply)
-
-            translated_reply = translate(full_reply, target_lang)
-
-            st.session_state.messages.append({"role": "assistant", "content": translated_reply})
-            msg_placeholder.markdown(translated_reply)
+            for piece in turn:
+                renderer.append(piece)
+            renderer.flush()
+            turn.finish(render_stats=renderer.stats())
 
         except Exception as e:
-            st.error(f"⚠️ An error occurred: {e}")
+            st.error(f"⚠️ {ui_text(target_lang, 'error', error=e)}")
+            save_session(session)
+
+# ----------------------------
+# Chat Area
+# ----------------------------
+# Runs as a fragment: sending a message or clicking a quick question reruns
+# only this function, not the page config, sidebar, header, video and
+# language picker above it.
+@st.fragment
+def chat_area(target_lang):
+    st.markdown(f"**{ui_text(target_lang, 'quick_questions')}**")
+    cols = st.columns(len(QUICK_QUESTIONS))
+
+    for i, (label, value) in enumerate(QUICK_QUESTIONS.items()):
+        icon = label.split(" ", 1)[0]
+        cols[i].button(f"{icon} {quick_question(target_lang, value)}", on_click=ask_quick_question, args=(value,))
+
+    # Display Chat History
+    session = current_session()
+    messages = session.messages
+    hidden = max(0, len(messages) - 1 - st.session_state.history_window)
+    if hidden:
+        st.button(f"⬆️ {ui_text(target_lang, 'load_earlier', hidden=hidden)}", on_click=show_earlier_messages)
+
+    for msg in messages[1 + hidden:]:
+        st.chat_message(msg.role).markdown(msg.content)
+
+    # User Input
+    user_input = st.chat_input(ui_text(target_lang, "chat_placeholder"))
+
+    # Quick questions are shown in the selected language but their English
+    # form is already known, so they need no translation.
+    canonical = None
+    if "prompt" in st.session_state:
+        canonical = st.session_state.prompt
+        prompt = quick_question(target_lang, canonical)
+        del st.session_state["prompt"]
+    elif user_input:
+        prompt = user_input
+    else:
+        prompt = None
+
+    if prompt:
+        generate_reply(session, prompt, target_lang, canonical)
+
+
+chat_area(target_lang)
@@ -3,21 +3,18 @@ import requests
 from googletrans import Translator
 
 from dotenv import load_dotenv
-from google import genai
 from google.genai import types
 import os
 
+from clients import get_gemini_client, get_http_session
+
 # Load environment variables from .env file
 load_dotenv('.env.txt')
 
 
 
 # ---- Gemini API 2025-12-04: ----
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY is not set in environment variables.")
-
-client = genai.Client(api_key=GEMINI_API_KEY)
+client = get_gemini_client()
 
 # --- Config ---
 UNHCR_LOGO = "https://www.unhcr.org/themes/custom/project/logo.svg"
@@ -27,7 +24,7 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY") # ensure when uploading there is no rul
 if not GROQ_API_KEY:
     raise ValueError("GROQ_API_KEY is not set in the environment variables.")
 
-API_URL = "https://api.groq.com/openai/v1/chat/completions"
+API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
 MODEL = "llama3-70b-8192"
 DOVE_EMOJI = "🕊️"
 
@@ -182,7 +179,7 @@ if prompt:
 
     with st.spinner("Thinking..."):
         try:
-            response = requests.post(API_URL, headers={
+            response = get_http_session().post(API_URL, headers={
                 "Authorization": f"Bearer {GROQ_API_KEY}",
                 "Content-Type": "application/json"
             }, json={
@@ -203,7 +200,7 @@ if prompt:
 # --- Test API ---
 def get_api_response(messages):
     try:
-        response = requests.post(API_URL, headers={
+        response = get_http_session().post(API_URL, headers={
             "Authorization": f"Bearer {GROQ_API_KEY}",
             "Content-Type": "application/json"
         }, json={
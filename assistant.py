@@ -0,0 +1,235 @@
+import os
+import time
+
+from google.genai import types
+
+from clients import get_gemini_client
+from context_cache import get_context_cache
+from conversation import estimate_tokens
+from faq import FAQ_ENABLED, get_faq_matcher
+from languages import NATIVE, response_strategy, with_response_language
+from message_store import Message
+from recorder import TurnRecording, should_record
+from response_cache import RESPONSE_CACHE_ENABLED, get_response_cache
+from retrieval import format_passages, get_retriever
+from sessions import get_session_manager
+from state_store import allow, get_state_store
+from streaming import translate_stream
+from translation import get_translation_service
+
+# ----------------------------
+# Assistant Core
+# ----------------------------
+# The generation pipeline without any UI: prompt building, input translation,
+# Gemini streaming, reply translation and session bookkeeping. Used by the
+# Streamlit app (app.py) and the headless HTTP/SSE service (api.py).
+GEMINI_MODEL = os.getenv("OMBUDS_GEMINI_MODEL", "gemini-2.5-flash")
+
+SYSTEM_PROMPT = (
+    "You are a neutral and compassionate assistant named Yiyang for the "
+    "Ombudsman and Mediator Office of UNHCR. Your goal is to provide clear, "
+    "impartial, and helpful guidance on conflict resolution, workplace fairness, "
+    "and emotional support."
+)
+
+# Button label -> question sent, shown above the chat.
+QUICK_QUESTIONS = {
+    "⚖️ How can I resolve a workplace conflict?": "How can I resolve a workplace conflict?",
+    "📝 What is the process for filing a grievance?": "What is the process for filing a grievance?",
+    "🤝 How can I mediate a disagreement?": "How can I mediate a disagreement?",
+    "📞 How can I access Ombudsman services?": "How can I access Ombudsman services?",
+    "💬 How do I receive emotional support at work?": "How do I receive emotional support at work?"
+}
+
+# Per-session message limit, counted in the shared state store so it holds
+# across workers.
+RATE_LIMIT_PER_MINUTE = int(os.getenv("OMBUDS_RATE_LIMIT_PER_MINUTE", "20"))
+
+
+def new_session():
+    return get_session_manager().create([Message("system", SYSTEM_PROMPT)])
+
+
+def get_session(token):
+    return get_session_manager().get(token)
+
+
+def save_session(session):
+    get_session_manager().save(session)
+
+
+def within_rate_limit(session):
+    return allow(get_state_store(), session.token, RATE_LIMIT_PER_MINUTE, 60)
+
+
+class Turn:
+    """
+    One user message and its streamed reply.
+
+    Creating a Turn records the user message (translated to English unless
+    its English canonical form is passed in, or it is a frequently asked
+    question answered from faq.json). Iterating it yields the reply
+    as displayed to the user (already in target_lang), piece by piece;
+    finish() then records the assistant message and saves the session.
+    """
+
+    def __init__(self, session, prompt, target_lang, canonical=None):
+        self.session = session
+        self.prompt = prompt
+        self.target_lang = target_lang
+
+        self.reply = ""
+        self.canonical = ""
+        self.prompt_stats = None
+        # True when the reply came from the response cache instead of Gemini.
+        self.cache_hit = False
+        # The FAQ intent answered from the curated answers, if any.
+        self.faq = None
+        # Milliseconds spent translating the prompt, how long translating the
+        # reply ran on after Gemini finished (0 for native replies), and
+        # milliseconds spent finding report passages.
+        self.timings = {"translate_input_ms": 0.0, "translate_reply_ms": 0.0, "retrieval_ms": 0.0}
+
+        # Opt-in capture of this turn as a replay fixture (see recorder.py).
+        self.recording = None
+        if should_record(session.token):
+            self.recording = TurnRecording(prompt, target_lang, response_strategy(target_lang))
+
+        # A first message that is a frequently asked question, in any language,
+        # is recorded as the intent's English question; no translation needed.
+        if FAQ_ENABLED and len(session.messages) == 1:
+            self.faq = get_faq_matcher().match(canonical or prompt)
+            if self.faq is not None:
+                canonical = self.faq.question
+
+        if canonical is None:
+            translator = self._translation_service()
+            started = time.perf_counter()
+            canonical = translator.translate(prompt, "en")
+            self.timings["translate_input_ms"] = (time.perf_counter() - started) * 1000
+        session.messages.append(Message("user", prompt, canonical))
+        self.question = canonical
+
+    def _translation_service(self):
+        service = get_translation_service()
+        return self.recording.translation(service) if self.recording else service
+
+    def _response_cache(self):
+        # Only first messages: later answers depend on the conversation so far.
+        if RESPONSE_CACHE_ENABLED and len(self.session.messages) == 2:
+            return get_response_cache(GEMINI_MODEL, SYSTEM_PROMPT)
+        return None
+
+    def __iter__(self):
+        session = self.session
+        if self.faq is not None:
+            self.canonical = self.faq.answers["en"]
+            self.reply = get_faq_matcher().answer(self.faq, self.target_lang, self._translation_service())
+            if self.recording:
+                self.recording.piece()
+            yield self.reply
+            return
+
+        cache = self._response_cache()
+        if cache is not None:
+            cached = cache.lookup(self.question, self.target_lang)
+            if cached is not None:
+                self.cache_hit = True
+                self.reply, self.canonical = cached
+                if self.recording:
+                    self.recording.piece()
+                yield self.reply
+                return
+
+        system_instruction, contents, self.prompt_stats = session.conversation.build_contents(
+            session.messages
+        )
+        self._add_report_passages(contents)
+
+        # Either have Gemini answer in the selected language directly, or
+        # answer in English and translate afterwards.
+        answer_natively = response_strategy(self.target_lang) == NATIVE
+        if answer_natively:
+            system_instruction = with_response_language(system_instruction, self.target_lang)
+
+        # The system instruction comes from the shared context cache when it
+        # is large enough to be cached server-side.
+        config, prefix = get_context_cache().generate_config(GEMINI_MODEL, system_instruction)
+        recording = self.recording
+        if recording:
+            recording.sent()
+        response_stream = get_gemini_client().models.generate_content_stream(
+            model=GEMINI_MODEL,
+            config=config,
+            contents=prefix + contents
+        )
+
+        model_parts = []
+        model_done = []
+
+        def chunk_texts():
+            for chunk in response_stream:
+                if chunk.text:
+                    model_parts.append(chunk.text)
+                    if recording:
+                        recording.chunk(chunk.text)
+                    yield chunk.text
+            model_done.append(time.perf_counter())
+
+        if answer_natively:
+            pieces = chunk_texts()
+        else:
+            # Translate sentence by sentence while Gemini is still generating.
+            pieces = translate_stream(chunk_texts(), self.target_lang, self._translation_service())
+
+        shown_parts = []
+        for piece in pieces:
+            shown_parts.append(piece)
+            if recording:
+                recording.piece()
+            yield piece
+
+        if not answer_natively and model_done:
+            self.timings["translate_reply_ms"] = (time.perf_counter() - model_done[0]) * 1000
+        self.canonical = "".join(model_parts)
+        self.reply = "".join(shown_parts)
+        if cache is not None:
+            cache.add(self.question, self.target_lang, self.reply, self.canonical)
+
+    def _add_report_passages(self, contents):
+        # Passages from the Year in Review reports go with this question only;
+        # the history keeps the bare question, so they never pile up.
+        retriever = get_retriever()
+        if retriever is None or not contents:
+            return
+        started = time.perf_counter()
+        passages = retriever.retrieve(self.question)
+        self.timings["retrieval_ms"] = (time.perf_counter() - started) * 1000
+        if passages:
+            text = format_passages(passages)
+            contents[-1].parts.insert(0, types.Part(text=text))
+            self.prompt_stats["report_passages"] = [passage.cite() for passage in passages]
+            self.prompt_stats["report_tokens"] = estimate_tokens(text)
+
+    def finish(self, **meta):
+        """
+        Record the reply (with any extra per-reply stats) and save the session.
+        """
+        session = self.session
+        session.messages.append(Message(
+            "assistant", self.reply, self.canonical,
+            meta={
+                "prompt_stats": self.prompt_stats,
+                "cached": self.cache_hit,
+                "faq": self.faq.name if self.faq else None,
+                **meta,
+            },
+        ))
+        # Refresh the rolling summary after the reply, off the critical path.
+        session.conversation.summarize_in_background(session.messages)
+        save_session(session)
+        if self.recording:
+            self.recording.save(
+                session.token, len(session.messages) // 2 - 1, GEMINI_MODEL, self.canonical,
+                faq=self.faq.name if self.faq else None, cached=self.cache_hit,
+            )
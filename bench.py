@@ -0,0 +1,340 @@
+import argparse
+import contextlib
+import inspect
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import timeit
+
+from conversation import ConversationManager, convert_history_to_prompt
+from faq import FaqMatcher
+from message_store import Message, MessageStore
+from response_cache import ResponseCache
+from retrieval import ReportRetriever, build_index
+from state_store import MemoryStore
+from streaming import ThrottledRenderer
+from translation import TranslationService, cache_key
+
+# ----------------------------
+# Micro-benchmarks
+# ----------------------------
+# Timings for the helpers every message goes through, compared against the
+# stored baseline (bench_baseline.json) so a refactor that slows the hot path
+# fails loudly:
+#
+#   python bench.py                  # compare; exits 1 on a regression
+#   python bench.py --update         # re-record the baseline
+#   python bench.py -k history       # only benchmarks whose name matches
+#
+# Machines differ in speed, so every result is stored relative to a fixed
+# pure-Python calibration loop timed in the same run.
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+# Fail when a benchmark is this much slower than its baseline (0.25 = 25%).
+REGRESSION_THRESHOLD = float(os.getenv("OMBUDS_BENCH_THRESHOLD", "0.25"))
+# Benchmarks faster than this per call are dominated by timer and cache noise,
+# so they are allowed twice the threshold.
+SHORT_BENCHMARK_US = 50
+
+USER_TEXT = "My manager keeps taking credit for my work in team meetings. What can I do about it?"
+ASSISTANT_TEXT = (
+    "I'm sorry you are dealing with this. You could start by keeping a record of your "
+    "contributions, then raise it calmly with your manager. If that does not help, the "
+    "Ombudsman can talk it through with you confidentially and explain informal options. "
+) * 3
+
+
+def make_messages(turns):
+    messages = [Message("system", "You are a neutral and compassionate assistant.")]
+    for i in range(turns):
+        messages.append(Message("user", f"{USER_TEXT} ({i})"))
+        messages.append(Message("assistant", ASSISTANT_TEXT))
+    return messages
+
+
+class FakePlaceholder:
+    def markdown(self, body):
+        pass
+
+
+class FakeTranslator:
+    def __init__(self, target):
+        self.target = target
+
+    def translate(self, text):
+        return f"[{self.target}] {text}"
+
+
+def calibration():
+    total = 0
+    for i in range(20000):
+        total += i * i % 7
+    return total
+
+
+# ----------------------------
+# Benchmarks
+# ----------------------------
+# Each entry returns a zero-argument callable, or yields one and cleans up
+# after it; setup runs outside the timing.
+
+def bench_history_prompt(turns):
+    def setup():
+        messages = make_messages(turns)
+        return lambda: convert_history_to_prompt(messages)
+    return setup
+
+
+def bench_build_contents(turns):
+    def setup():
+        messages = make_messages(turns)
+        conversation = ConversationManager(summarize=lambda previous, new: previous)
+        # Steady state: the summary has caught up with everything outside the window.
+        conversation.load_state({
+            "summary": "The user reported a manager taking credit for their work.",
+            "summarized_upto": conversation._window_start(messages),
+        })
+        return lambda: conversation.build_contents(messages)
+    return setup
+
+
+def bench_render_loop():
+    # A 1200-token reply arriving in ~4-token chunks, 25 ms apart.
+    chunks = [ASSISTANT_TEXT[i:i + 16] for i in range(0, len(ASSISTANT_TEXT), 16)] * 6
+
+    def run():
+        now = itertools.count(0, 0.025)
+        renderer = ThrottledRenderer(FakePlaceholder(), clock=lambda: next(now))
+        for chunk in chunks:
+            renderer.append(chunk)
+        renderer.flush()
+        return renderer.text
+    return lambda: run
+
+
+def _translation_service():
+    return TranslationService(
+        store=MemoryStore(), workers=1, translator_factory=lambda source, target: FakeTranslator(target)
+    )
+
+
+def bench_translate_miss():
+    def setup():
+        service = _translation_service()
+        key = f"tr:{cache_key(USER_TEXT, 'en', 'fr')}"
+
+        # The source is given, as faq.py does for its answers, so only the cache
+        # and the translator are timed, not language detection.
+        def run():
+            service.translate(USER_TEXT, "fr", source="en")
+            # Forget it again so every call misses without the caches growing.
+            service._memory.clear()
+            service.shared.delete(key)
+        return run
+    return setup
+
+
+def bench_translate_hit():
+    def setup():
+        service = _translation_service()
+        service.translate(USER_TEXT, "fr", source="en")
+        return lambda: service.translate(USER_TEXT, "fr", source="en")
+    return setup
+
+
+def bench_response_cache_lookup(questions):
+    def setup():
+        cache = ResponseCache("bench", store=MemoryStore())
+        words = USER_TEXT.lower().replace("?", "").replace(".", "").split() + ASSISTANT_TEXT.lower().split()
+        rng = random.Random(0)
+        for _ in range(questions):
+            cache.add(" ".join(rng.sample(words, 8)), "fr", ASSISTANT_TEXT, ASSISTANT_TEXT)
+        return lambda: cache.lookup("How do I file a grievance against my manager?", "fr")
+    return setup
+
+
+def bench_faq_match():
+    def setup():
+        matcher = FaqMatcher.from_file()
+        return lambda: matcher.match("¿Cómo presento una queja formal contra mi supervisor?")
+    return setup
+
+
+def bench_report_retrieval(reports):
+    # Synthetic 25-page reports of about five passages a page, over a vocabulary
+    # large enough that most words are rare, as in real reports.
+    def setup():
+        rng = random.Random(0)
+        words = USER_TEXT.lower().replace("?", "").replace(".", "").split() + [f"term{i}" for i in range(20000)]
+        documents = [
+            (f"Year in Review {year}", [
+                ". ".join(" ".join(rng.choices(words, k=14)) for _ in range(30)) for _ in range(25)
+            ])
+            for year in range(reports)
+        ]
+        retriever = ReportRetriever(build_index(documents), min_score=0)
+        return lambda: retriever.retrieve(USER_TEXT)
+    return setup
+
+
+def bench_history_render(window):
+    # What app.py does per rerun: slice the visible window out of a long,
+    # partly offloaded history and hand each message to the page.
+    def setup():
+        with tempfile.TemporaryDirectory(prefix="bench-") as offload_dir:
+            store = MessageStore(make_messages(500), max_bytes=256 * 1024, offload_dir=offload_dir)
+            sink = []
+
+            def run():
+                sink.clear()
+                hidden = max(0, len(store) - 1 - window)
+                for msg in store[1 + hidden:]:
+                    sink.append((msg.role, msg.content))
+            yield run
+    return setup
+
+
+BENCHMARKS = {
+    "history_prompt_10": bench_history_prompt(10),
+    "history_prompt_100": bench_history_prompt(100),
+    "history_prompt_1000": bench_history_prompt(1000),
+    "build_contents_1000": bench_build_contents(1000),
+    "render_loop": bench_render_loop(),
+    "translate_miss": bench_translate_miss(),
+    "translate_hit": bench_translate_hit(),
+    "response_cache_lookup_1000": bench_response_cache_lookup(1000),
+    "faq_match": bench_faq_match(),
+    "report_retrieval_40": bench_report_retrieval(40),
+    "history_render_window": bench_history_render(20),
+    "history_render_full": bench_history_render(1000),
+}
+
+
+def timed(func, min_seconds=0.2):
+    """
+    Return a Timer for func and a call count that takes at least min_seconds.
+    """
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    while elapsed < min_seconds:
+        number *= 2
+        elapsed = timer.timeit(number)
+    return timer, number
+
+
+@contextlib.contextmanager
+def prepared(name):
+    setup = BENCHMARKS[name]()
+    if not inspect.isgenerator(setup):
+        yield setup
+        return
+    try:
+        yield next(setup)
+    finally:
+        setup.close()
+
+
+def measure_relative(name, repeat):
+    """
+    Return the median (microseconds, microseconds relative to the calibration loop).
+    """
+    # Every repeat times the benchmark between two calibration runs, so a slow
+    # patch on a shared machine affects both sides of that repeat's ratio,
+    # and the medians ignore the odd repeat that was unusually fast or slow.
+    calibration_timer, calibration_number = timed(calibration)
+    with prepared(name) as func:
+        timer, number = timed(func)
+        times, ratios = [], []
+        for _ in range(repeat):
+            before = calibration_timer.timeit(calibration_number) / calibration_number
+            seconds = timer.timeit(number) / number
+            after = calibration_timer.timeit(calibration_number) / calibration_number
+            times.append(seconds * 1e6)
+            ratios.append(seconds / ((before + after) / 2))
+    return statistics.median(times), statistics.median(ratios)
+
+
+def run(names, repeat):
+    results = {}
+    for name in names:
+        us, relative = measure_relative(name, repeat)
+        results[name] = {"us": round(us, 3), "relative": round(relative, 5)}
+        print(f"{name:<24} {us:>12.2f} us", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold, repeat, retries=2):
+    """
+    Return (name, change, allowed) for every benchmark slower than its threshold.
+    A benchmark has to be slow on every retry to count; short ones get twice
+    the threshold.
+    """
+    regressions = []
+    for name, result in results.items():
+        recorded = baseline.get("benchmarks", {}).get(name)
+        if recorded is None:
+            continue
+        allowed = threshold * 2 if recorded["us"] < SHORT_BENCHMARK_US else threshold
+        change = result["relative"] / recorded["relative"] - 1
+        for _ in range(retries):
+            if change <= allowed:
+                break
+            us, relative = measure_relative(name, repeat)
+            if relative < result["relative"]:
+                result.update(us=round(us, 3), relative=round(relative, 5))
+                change = relative / recorded["relative"] - 1
+        result["change"] = round(change, 3)
+        if change > allowed:
+            regressions.append((name, change, allowed))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the chat hot path.")
+    parser.add_argument("-k", dest="pattern", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--update", action="store_true", help="record the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print the full results as JSON")
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if args.pattern in name]
+    if not names:
+        parser.error(f"no benchmark matches {args.pattern!r}")
+
+    results = run(names, args.repeat)
+
+    if args.update:
+        baseline = {"benchmarks": {}}
+        if os.path.exists(BASELINE_PATH):
+            with open(BASELINE_PATH, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline["python"] = platform.python_version()
+        baseline["benchmarks"].update(results)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline updated ({len(results)} benchmarks)", file=sys.stderr)
+        return
+
+    if not os.path.exists(BASELINE_PATH):
+        sys.exit("no baseline recorded yet; run with --update first")
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold, args.repeat)
+
+    if args.json:
+        print(json.dumps({"benchmarks": results}, indent=2))
+    for name, change, allowed in regressions:
+        print(f"REGRESSION {name}: {change:+.0%} vs baseline (threshold {allowed:.0%})", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+    print("no regressions", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import os
+import threading
+
+import httpx
+import requests
+from dotenv import load_dotenv
+from google import genai
+from google.genai import types
+from requests.adapters import HTTPAdapter
+
+# ----------------------------
+# Process-wide API clients
+# ----------------------------
+# Streamlit re-executes app.py on every interaction, but imported modules are
+# loaded once per process. Keeping the clients here means every session and
+# every rerun reuses the same keep-alive connection pool instead of paying a
+# fresh TLS handshake per message.
+load_dotenv('.env.txt')
+
+HTTP_POOL_SIZE = int(os.getenv("OMBUDS_HTTP_POOL_SIZE", "20"))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("OMBUDS_HTTP_KEEPALIVE_SECONDS", "120"))
+# Point the Gemini client somewhere else, e.g. the local stand-in in
+# mock_services.py for load tests.
+GEMINI_BASE_URL = os.getenv("OMBUDS_GEMINI_BASE_URL")
+
+_lock = threading.Lock()
+_gemini_client = None
+_http_session = None
+
+
+def get_gemini_client():
+    """
+    Return the shared Gemini client, creating it on first use.
+    """
+    global _gemini_client
+    if _gemini_client is None:
+        with _lock:
+            if _gemini_client is None:
+                api_key = os.getenv("GEMINI_API_KEY")
+                if not api_key:
+                    raise ValueError("GEMINI_API_KEY is not set.")
+
+                limits = httpx.Limits(
+                    max_connections=HTTP_POOL_SIZE,
+                    max_keepalive_connections=HTTP_POOL_SIZE,
+                    keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+                )
+                _gemini_client = genai.Client(
+                    api_key=api_key,
+                    http_options=types.HttpOptions(base_url=GEMINI_BASE_URL, client_args={"limits": limits}),
+                )
+    return _gemini_client
+
+
+def set_gemini_client(client):
+    """
+    Replace the shared Gemini client, e.g. with the stand-in replay.py uses.
+    """
+    global _gemini_client
+    with _lock:
+        _gemini_client = client
+
+
+def get_http_session():
+    """
+    Return the shared requests session used for plain HTTP APIs (e.g. Groq).
+    """
+    global _http_session
+    if _http_session is None:
+        with _lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _http_session = session
+    return _http_session
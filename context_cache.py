@@ -0,0 +1,140 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from google.genai import types
+
+from clients import get_gemini_client
+from conversation import estimate_tokens
+from state_store import get_state_store
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Gemini Context Cache
+# ----------------------------
+# The system instruction (plus any stable prefix such as retrieved policy
+# context) is identical for every session, so it is uploaded once as a
+# server-side cached-content object and referenced by name on every turn.
+# Names are shared between workers through the state store, so a prefix is
+# uploaded once per deployment rather than once per process.
+# Gemini refuses to cache very small prefixes, so anything below
+# CONTEXT_CACHE_MIN_TOKENS is sent inline as before.
+CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("OMBUDS_CONTEXT_CACHE_TTL_SECONDS", "3600"))
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("OMBUDS_CONTEXT_CACHE_MIN_TOKENS", "1024"))
+# Stop using a cache entry this long before it expires on the server.
+CONTEXT_CACHE_MARGIN_SECONDS = 60
+# After a failed create, send inline for this long before trying again.
+CONTEXT_CACHE_RETRY_SECONDS = 600
+# Distinct model/instruction/prefix combinations remembered per process.
+CONTEXT_CACHE_MAX_ENTRIES = 64
+
+
+class ContextCache:
+    def __init__(self, ttl_seconds=CONTEXT_CACHE_TTL_SECONDS, min_tokens=CONTEXT_CACHE_MIN_TOKENS, store=None,
+                 client=None, max_entries=CONTEXT_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self.store = store or get_state_store()
+        self.client = client
+        self.max_entries = max_entries
+
+        # key -> (cache name or None, expires_at), oldest first
+        self._entries = OrderedDict()
+        # Keys whose cache is being created right now.
+        self._creating = set()
+        self._lock = threading.Lock()
+
+    def _create(self, model, system_instruction, prefix):
+        config = types.CreateCachedContentConfig(
+            system_instruction=system_instruction,
+            contents=prefix or None,
+            ttl=f"{self.ttl_seconds}s",
+            display_name="ombuds-system-instruction",
+        )
+        cache = (self.client or get_gemini_client()).caches.create(model=model, config=config)
+        return cache.name
+
+    def get(self, model, system_instruction, prefix=None):
+        """
+        Return the cached-content name for this model/instruction/prefix, or
+        None if it should be sent inline.
+        """
+        prefix_text = "".join(
+            part.text or "" for content in (prefix or []) for part in (content.parts or [])
+        )
+        if estimate_tokens((system_instruction or "") + prefix_text) < self.min_tokens:
+            return None
+
+        key = hashlib.sha1(f"{model}\0{system_instruction}\0{prefix_text}".encode("utf-8")).hexdigest()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                return entry[0]
+            # Another request is already creating it: send this one inline
+            # rather than wait for, or repeat, the upload.
+            if key in self._creating:
+                return None
+            self._creating.add(key)
+
+        # Network calls happen outside the lock, so other keys and other
+        # sessions are never held up by them.
+        try:
+            shared = self.store.get(f"ctxcache:{key}")
+            if shared is not None:
+                name, expires_at = shared.decode().split(" ")
+                expires_at = float(expires_at)
+            else:
+                lifetime = self.ttl_seconds - CONTEXT_CACHE_MARGIN_SECONDS
+                try:
+                    name = self._create(model, system_instruction, prefix)
+                    self.store.set(f"ctxcache:{key}", f"{name} {now + lifetime}".encode(), ttl=lifetime)
+                except Exception:
+                    logger.exception("creating Gemini context cache failed; sending inline")
+                    name = None
+                    lifetime = CONTEXT_CACHE_RETRY_SECONDS
+                expires_at = now + lifetime
+            with self._lock:
+                self._publish(key, name, expires_at)
+            return name
+        finally:
+            with self._lock:
+                self._creating.discard(key)
+
+    def _publish(self, key, name, expires_at):
+        self._entries[key] = (name, expires_at)
+        self._entries.move_to_end(key)
+        now = time.time()
+        for stale in [k for k, (_, expires) in self._entries.items() if expires <= now]:
+            del self._entries[stale]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def generate_config(self, model, system_instruction, prefix=None):
+        """
+        Return (GenerateContentConfig, contents prefix to send inline).
+        """
+        name = self.get(model, system_instruction, prefix)
+        if name:
+            return types.GenerateContentConfig(cached_content=name), []
+        return types.GenerateContentConfig(system_instruction=system_instruction), list(prefix or [])
+
+
+_context_cache = None
+_context_cache_lock = threading.Lock()
+
+
+def get_context_cache():
+    """
+    Return the process-wide context cache shared by all sessions.
+    """
+    global _context_cache
+    if _context_cache is None:
+        with _context_cache_lock:
+            if _context_cache is None:
+                _context_cache = ContextCache()
+    return _context_cache
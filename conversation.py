@@ -0,0 +1,194 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from google.genai import types
+
+from clients import get_gemini_client
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Conversation Window
+# ----------------------------
+# Only the last few turns are sent verbatim, within a token budget. Anything
+# older is folded into a rolling summary which is refreshed in the background
+# after a reply has finished, so summarising never delays a reply.
+KEEP_TURNS = int(os.getenv("OMBUDS_KEEP_TURNS", "6"))
+TOKEN_BUDGET = int(os.getenv("OMBUDS_HISTORY_TOKEN_BUDGET", "3000"))
+SUMMARY_MODEL = os.getenv("OMBUDS_SUMMARY_MODEL", "gemini-2.5-flash-lite")
+
+SUMMARY_INSTRUCTION = (
+    "You maintain a running summary of a conversation between a UNHCR staff member "
+    "and the Ombudsman assistant. Merge the new turns into the previous summary. "
+    "Keep facts, people's roles, dates, what was already advised and any open "
+    "questions. Write in English, at most 200 words, no preamble."
+)
+
+_summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summarize")
+
+
+def estimate_tokens(text):
+    """
+    Rough token count: one per CJK character, one per four other characters.
+    """
+    cjk = sum(1 for ch in text if "\u3000" <= ch <= "\u9fff")
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def convert_history_to_prompt(messages):
+    system_instruction = None
+    dialogue = ""
+
+    for msg in messages:
+        text = msg.canonical
+        if msg.role == "system":
+            system_instruction = text
+        elif msg.role == "user":
+            dialogue += f"User: {text}\n"
+        elif msg.role == "assistant":
+            dialogue += f"Assistant: {text}\n"
+
+    return system_instruction, dialogue
+
+
+def convert_history_to_contents(messages):
+    """
+    Like convert_history_to_prompt(), but as structured Gemini multi-turn contents.
+    """
+    system_instruction = None
+    contents = []
+
+    for msg in messages:
+        text = msg.canonical
+        if msg.role == "system":
+            system_instruction = text
+        elif msg.role in ("user", "assistant"):
+            role = "user" if msg.role == "user" else "model"
+            contents.append(types.Content(role=role, parts=[types.Part(text=text)]))
+
+    return system_instruction, contents
+
+
+def summarize_with_gemini(previous_summary, turns):
+    response = get_gemini_client().models.generate_content(
+        model=SUMMARY_MODEL,
+        config=types.GenerateContentConfig(system_instruction=SUMMARY_INSTRUCTION),
+        contents=[f"Previous summary:\n{previous_summary or '(none)'}\n\nNew turns:\n{turns}"],
+    )
+    return (response.text or "").strip()
+
+
+class ConversationManager:
+    def __init__(self, keep_turns=KEEP_TURNS, token_budget=TOKEN_BUDGET, summarize=summarize_with_gemini):
+        self.keep_turns = keep_turns
+        self.token_budget = token_budget
+        self.summarize = summarize
+
+        # messages[1:summarized_upto] are covered by self.summary
+        # (messages[0] is the system message).
+        self.summary = ""
+        self.summarized_upto = 1
+
+        # Running token count of the whole history, for the before/after stats
+        # (so older, possibly offloaded, messages are never re-read).
+        self.history_tokens = 0
+        self._counted_upto = 1
+
+        self._lock = threading.Lock()
+        self._pending = None
+
+    def _window_start(self, messages):
+        start = max(1, len(messages) - 2 * self.keep_turns)
+        used = 0
+        index = len(messages)
+        while index > start:
+            cost = estimate_tokens(messages[index - 1].canonical)
+            if used + cost > self.token_budget and index < len(messages):
+                break
+            used += cost
+            index -= 1
+        # Multi-turn contents have to open with a user turn.
+        while index < len(messages) - 1 and messages[index].role != "user":
+            index += 1
+        return index
+
+    def build_contents(self, messages):
+        """
+        Return (system_instruction, contents, stats) for the next Gemini call.
+        """
+        system_instruction = messages[0].canonical if messages and messages[0].role == "system" else None
+
+        with self._lock:
+            summary = self.summary
+            summarized_upto = self.summarized_upto
+
+        # Turns the summary has not caught up with yet stay verbatim.
+        start = min(self._window_start(messages), summarized_upto)
+        recent = messages[start:]
+        _, contents = convert_history_to_contents(recent)
+
+        summary_text = ""
+        if summary and contents:
+            summary_text = f"Summary of the earlier conversation: {summary}"
+            contents[0].parts.insert(0, types.Part(text=summary_text))
+
+        for msg in messages[self._counted_upto:]:
+            self.history_tokens += estimate_tokens(msg.canonical)
+        self._counted_upto = len(messages)
+
+        base = estimate_tokens(system_instruction or "")
+        stats = {
+            "full_tokens": base + self.history_tokens,
+            "prompt_tokens": base + estimate_tokens(summary_text) + sum(
+                estimate_tokens(msg.canonical) for msg in recent if msg.role != "system"
+            ),
+            "verbatim_messages": len(recent),
+        }
+        logger.info("prompt tokens: %(prompt_tokens)d (full history: %(full_tokens)d)", stats)
+        return system_instruction, contents, stats
+
+    def to_state(self):
+        """
+        Plain-data snapshot of the summary bookkeeping, for persistence.
+        """
+        with self._lock:
+            return {
+                "summary": self.summary,
+                "summarized_upto": self.summarized_upto,
+                "history_tokens": self.history_tokens,
+                "counted_upto": self._counted_upto,
+            }
+
+    def load_state(self, state):
+        with self._lock:
+            self.summary = state.get("summary", "")
+            self.summarized_upto = state.get("summarized_upto", 1)
+            self.history_tokens = state.get("history_tokens", 0)
+            self._counted_upto = state.get("counted_upto", 1)
+
+    def summarize_in_background(self, messages):
+        """
+        Fold turns that have left the window into the summary, off the request path.
+        """
+        start = self._window_start(messages)
+        with self._lock:
+            if self._pending is not None and not self._pending.done():
+                return
+            if start <= self.summarized_upto:
+                return
+            _, turns = convert_history_to_prompt(messages[self.summarized_upto:start])
+            self._pending = _summary_executor.submit(self._update_summary, self.summary, turns, start)
+
+    def _update_summary(self, previous_summary, turns, upto):
+        try:
+            summary = self.summarize(previous_summary, turns)
+        except Exception:
+            logger.exception("conversation summary failed")
+            return
+        if not summary:
+            return
+        with self._lock:
+            self.summary = summary
+            self.summarized_upto = upto
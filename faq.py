@@ -0,0 +1,193 @@
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+
+import numpy as np
+
+# ----------------------------
+# FAQ Intent Matching
+# ----------------------------
+# Most first messages are one of a handful of questions (how to reach the
+# office, filing a grievance, mediation, emotional support, resolving a
+# conflict). Those can be answered from the curated answers in faq.json,
+# without Gemini and before any translation. Only open-ended questions go to
+# the model.
+#
+# The answers in faq.json are drafts that state office policy and are served
+# verbatim, so matching is off until the office has signed them off; set
+# OMBUDS_FAQ=1 to switch it on.
+#
+# The raw message, in whatever language or script it was typed, is compared
+# with each intent's example phrasings as TF-IDF-weighted character n-gram
+# vectors, so no word segmentation or translation is needed. An intent matches
+# when its best example is similar enough (FAQ_THRESHOLD), clearly ahead of
+# the next intent (FAQ_MARGIN), and the message names the intent's topic: it
+# contains one of the intent's keywords ("grievance", "plainte", "申诉") and
+# none of its excludes or the shared ones. Similarity alone would answer
+# "what is the process for filing a travel claim?" with the grievance answer;
+# excludes catch questions on the topic that the answer does not cover
+# ("can I file a grievance anonymously?", "I don't want mediation").
+#
+# Answers are written in English; a language without a curated answer gets
+# the English one through the translation service, whose cache makes that a
+# one-off cost.
+FAQ_ENABLED = os.getenv("OMBUDS_FAQ", "0") == "1"
+FAQ_PATH = os.getenv("OMBUDS_FAQ_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "faq.json"))
+FAQ_THRESHOLD = float(os.getenv("OMBUDS_FAQ_THRESHOLD", "0.45"))
+FAQ_MARGIN = float(os.getenv("OMBUDS_FAQ_MARGIN", "0.1"))
+# Longer messages describe a specific situation and deserve a specific answer.
+FAQ_MAX_CHARS = int(os.getenv("OMBUDS_FAQ_MAX_CHARS", "120"))
+FEATURE_DIMENSIONS = 4096
+NGRAM_SIZES = (1, 2, 3, 4)
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def _ngrams(text):
+    text = f" {_NON_WORD.sub(' ', text.lower()).strip()} "
+    grams = Counter()
+    for n in NGRAM_SIZES:
+        for i in range(len(text) - n + 1):
+            gram = text[i:i + n]
+            # Single characters only carry meaning in CJK scripts.
+            if n == 1 and not "　" <= gram <= "鿿":
+                continue
+            grams[zlib.crc32(gram.encode("utf-8")) % FEATURE_DIMENSIONS] += 1
+    return grams
+
+
+class Intent:
+    def __init__(self, name, question, examples, answers, keywords=(), excludes=()):
+        self.name = name
+        # The English question a matched message is recorded as.
+        self.question = question
+        self.examples = examples
+        self.answers = answers
+        # Lower-case fragments, in any language: a match needs one of the
+        # keywords and none of the excludes.
+        self.keywords = keywords
+        self.excludes = excludes
+
+    def mentions(self, text):
+        """
+        True if lower-cased text names this intent's topic.
+        """
+        return any(word in text for word in self.keywords)
+
+
+class FaqMatcher:
+    def __init__(self, intents, threshold=FAQ_THRESHOLD, margin=FAQ_MARGIN, max_chars=FAQ_MAX_CHARS, excludes=()):
+        self.intents = intents
+        self.threshold = threshold
+        self.margin = margin
+        self.max_chars = max_chars
+        # Excludes that apply to every intent, e.g. "don't want".
+        self.excludes = excludes
+
+        examples = [(i, text) for i, intent in enumerate(intents)
+                    for texts in intent.examples.values() for text in texts]
+        self._example_intent = np.array([i for i, _ in examples], dtype=np.int32)
+        counts = [_ngrams(text) for _, text in examples]
+
+        # N-grams shared by every intent ("how ", "can i") say little.
+        document_frequency = np.zeros(FEATURE_DIMENSIONS, dtype=np.float32)
+        for grams in counts:
+            for bucket in grams:
+                document_frequency[bucket] += 1
+        self._idf = np.log((1 + len(counts)) / (1 + document_frequency)).astype(np.float32) + 1
+        self._examples = np.stack([self._vector(grams) for grams in counts]) if counts else \
+            np.zeros((0, FEATURE_DIMENSIONS), dtype=np.float32)
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_file(cls, path=FAQ_PATH, **kwargs):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        intents = [
+            Intent(item["name"], item["question"], item["examples"], item["answer"],
+                   item.get("keywords", ()), item.get("excludes", ()))
+            for item in data["intents"]
+        ]
+        return cls(intents, excludes=data.get("excludes", ()), **kwargs)
+
+    def _vector(self, grams):
+        vector = np.zeros(FEATURE_DIMENSIONS, dtype=np.float32)
+        for bucket, count in grams.items():
+            vector[bucket] = 1 + math.log(count)
+        vector *= self._idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _best(self, text):
+        similarities = self._examples @ self._vector(_ngrams(text))
+        best = np.full(len(self.intents), -1.0, dtype=np.float32)
+        np.maximum.at(best, self._example_intent, similarities)
+        return best
+
+    def scores(self, text):
+        """
+        Return {intent name: best example similarity} for text.
+        """
+        return {intent.name: float(score) for intent, score in zip(self.intents, self._best(text))}
+
+    def match(self, text):
+        """
+        Return the Intent text asks about, or None if it is open-ended.
+        """
+        intent = None
+        if text and len(text) <= self.max_chars and self.intents:
+            best = self._best(text)
+            order = np.argsort(best)[::-1]
+            top = best[order[0]]
+            runner_up = best[order[1]] if len(order) > 1 else 0.0
+            if top >= self.threshold and top - runner_up >= self.margin and self._on_topic(order[0], text):
+                intent = self.intents[order[0]]
+        with self._lock:
+            if intent is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return intent
+
+    def _on_topic(self, index, text):
+        # The message names this intent's topic and asks nothing its answer
+        # leaves out.
+        text = text.lower().replace("’", "'")
+        excludes = list(self.excludes) + list(self.intents[index].excludes)
+        return self.intents[index].mentions(text) and not any(word in text for word in excludes)
+
+    def answer(self, intent, lang, translator):
+        """
+        The curated answer in lang, translated from English if there is none.
+        """
+        if lang in intent.answers:
+            return intent.answers[lang]
+        return translator.translate(intent.answers["en"], lang, source="en")
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_faq_matcher():
+    """
+    Return the process-wide FAQ matcher.
+    """
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = FaqMatcher.from_file()
+    return _matcher
@@ -0,0 +1,156 @@
+import re
+from collections import Counter
+
+# ----------------------------
+# Local Language Identification
+# ----------------------------
+# A cheap, offline guess at which of the supported languages a text is in, so
+# the translator is only called when the text is not already in the target
+# language. Non-Latin scripts are decided by character ranges; English, French
+# and Spanish by a small character-trigram profile (Cavnar & Trenkle style),
+# checked against the function words of other common Latin-script languages so
+# that German or Portuguese is not mistaken for the nearest supported one.
+# Cyrillic is only called Ukrainian with Ukrainian-only letters or words.
+# When unsure we return None and the caller translates as before, letting the
+# translator detect the language itself.
+MIN_CONFIDENCE = 0.3
+MIN_LATIN_LETTERS = 12
+
+TRIGRAM_PROFILES = {
+    "en": (
+        " th", "the", "he ", " an", "and", "nd ", " to", "to ", "ing", "ng ",
+        " of", "of ", " in", "ion", "ed ", "is ", " is", " yo", "you", "ou ",
+        "at ", "hat", " wh", " ca", "can", " ho", "how", "ow ", " wi", "ith",
+        "for", " fo", "or ", "er ", "es ", " be", "ll ", "ly ", "ent", " it",
+    ),
+    "fr": (
+        " de", "de ", "es ", " le", "le ", "ent", " la", "la ", "les", " et",
+        "et ", "que", " qu", "ue ", "ne ", " un", " co", "ous", " vo", "vou",
+        "re ", "eur", " pa", "ons", "ez ", "des", " po", "our", "ur ", "ais",
+        "ait", " se", " ce", "nt ", "té ", " à ", "tio", " du", "du ", "un ",
+    ),
+    "es": (
+        " de", "de ", " la", "la ", "os ", " el", "el ", "que", " qu", "ue ",
+        "as ", " en", "en ", "ión", "ón ", " co", "ar ", "do ", " lo", "los",
+        " pu", "ede", "mo ", "cóm", "ómo", " un", "una", "ra ", " es", "est",
+        "nte", " se", " po", "por", " su", "ado", "ía ", "ida", "ció", "las",
+    ),
+}
+
+_PROFILE_WEIGHTS = {
+    lang: {gram: len(grams) - rank for rank, gram in enumerate(grams)}
+    for lang, grams in TRIGRAM_PROFILES.items()
+}
+
+# Frequent short words of the supported and of other common Latin-script
+# languages. Trigram profiles of neighbouring languages overlap too much to
+# tell them apart, so a text with more function words of an unsupported
+# language than of the best supported one is left to the translator.
+FUNCTION_WORDS = {
+    "en": "the and is to of a in i my how can what with for you it do".split(),
+    "fr": "le la les et est un une de des je mon ma comment avec pour au du que vous puis".split(),
+    "es": "el la los las y es un una de del mi cómo como con para que por en puedo necesito".split(),
+    "de": "der die das und ist ein eine ich mein wie mit für nicht bei zu kann werden dem den".split(),
+    "it": "il lo gli e è un una di del della che come con per mio posso sono non sul".split(),
+    "pt": "o os a as e é um uma de do da que como com para meu posso não no na em".split(),
+    "nl": "de het een en is ik van mijn hoe met voor niet kan op werk".split(),
+}
+_FUNCTION_WORDS = {lang: frozenset(words) for lang, words in FUNCTION_WORDS.items()}
+_OTHER_LATIN_LANGUAGES = ("de", "it", "pt", "nl")
+
+# Letters that only appear in one of the Latin-script languages we support.
+_LATIN_MARKERS = {
+    "fr": set("èêëàâçœùûîïô"),
+    "es": set("ñ¿¡áíóú"),
+}
+_OTHER_LATIN_MARKERS = {
+    "de": set("äöüß"),
+    "pt": set("ãõ"),
+}
+
+_UKRAINIAN_LETTERS = set("іїєґІЇЄҐ")
+_RUSSIAN_LETTERS = set("ыэъёЫЭЪЁ")
+# Frequent words that exist in only one of the two languages.
+_UKRAINIAN_WORDS = frozenset("як що це та але або мене мені він вона вони ви ти чи з".split())
+_RUSSIAN_WORDS = frozenset("как что это или меня мне он она они вы ты ли".split())
+
+_NON_LETTERS = re.compile(r"[^\w]+|\d+|_+")
+
+
+def _script(char):
+    code = ord(char)
+    if 0x0600 <= code <= 0x06FF or 0x0750 <= code <= 0x077F or 0xFB50 <= code <= 0xFEFF:
+        return "arabic"
+    if 0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF or 0xF900 <= code <= 0xFAFF:
+        return "cjk"
+    if 0x0400 <= code <= 0x04FF:
+        return "cyrillic"
+    if code < 0x0250:
+        return "latin"
+    return "other"
+
+
+def _latin_language(text, letters):
+    normalized = " " + _NON_LETTERS.sub(" ", text.lower()) + " "
+    trigrams = Counter(normalized[i:i + 3] for i in range(len(normalized) - 2))
+
+    scores = {
+        lang: sum(count * weights.get(gram, 0) for gram, count in trigrams.items())
+        for lang, weights in _PROFILE_WEIGHTS.items()
+    }
+    for lang, markers in _LATIN_MARKERS.items():
+        marker_count = sum(1 for ch in letters if ch in markers)
+        scores[lang] += marker_count * 20
+
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    best, runner_up = scores[ranked[0]], scores[ranked[1]]
+    if not best:
+        return None, 0.0
+
+    words = normalized.split()
+    function_words = {
+        lang: sum(1 for word in words if word in vocabulary) for lang, vocabulary in _FUNCTION_WORDS.items()
+    }
+    for lang, markers in _OTHER_LATIN_MARKERS.items():
+        function_words[lang] += sum(1 for ch in letters if ch in markers)
+    if max(function_words[lang] for lang in _OTHER_LATIN_LANGUAGES) > function_words[ranked[0]]:
+        return None, 0.0
+    # Confidence is the winner's margin over the runner-up.
+    return ranked[0], (best - runner_up) / best
+
+
+def detect_language(text):
+    """
+    Return (language code, confidence) for text, or (None, 0.0) if unsure.
+    """
+    letters = [ch for ch in text if ch.isalpha()]
+    if not letters:
+        return None, 0.0
+
+    scripts = Counter(_script(ch) for ch in letters)
+    script, count = scripts.most_common(1)[0]
+    share = count / len(letters)
+
+    if script == "arabic":
+        return "ar", share
+    if script == "cjk":
+        return "zh", share
+    if script == "cyrillic":
+        words = set(_NON_LETTERS.sub(" ", text.lower()).split())
+        ukrainian = sum(1 for ch in letters if ch in _UKRAINIAN_LETTERS) + len(words & _UKRAINIAN_WORDS)
+        russian = sum(1 for ch in letters if ch in _RUSSIAN_LETTERS) + len(words & _RUSSIAN_WORDS)
+        if ukrainian > russian:
+            return "uk", share
+        return None, 0.0
+    if script == "latin" and len(letters) >= MIN_LATIN_LETTERS:
+        lang, confidence = _latin_language(text, letters)
+        return lang, confidence * share
+    return None, 0.0
+
+
+def is_language(text, lang, min_confidence=MIN_CONFIDENCE):
+    """
+    True if text is confidently already in lang (e.g. "en", "zh").
+    """
+    detected, confidence = detect_language(text)
+    return detected is not None and detected == lang.split("-")[0] and confidence >= min_confidence
@@ -0,0 +1,47 @@
+import os
+
+# ----------------------------
+# Reply Language Strategy
+# ----------------------------
+# "native":    Gemini is instructed to answer directly in the user's language,
+#              so there is no translation hop and the reply streams in that
+#              language from the first token.
+# "translate": Gemini answers in English and the reply is translated afterwards
+#              (sentence-pipelined, see streaming.py).
+# Languages listed in OMBUDS_TRANSLATE_AFTER (comma-separated codes, e.g. "ar,uk")
+# use "translate"; every other language uses "native".
+NATIVE = "native"
+TRANSLATE = "translate"
+
+LANGUAGE_NAMES = {
+    "en": "English",
+    "ar": "Arabic",
+    "fr": "French",
+    "es": "Spanish",
+    "zh": "Chinese (Simplified)",
+    "uk": "Ukrainian",
+}
+
+TRANSLATE_AFTER = {
+    code.strip() for code in os.getenv("OMBUDS_TRANSLATE_AFTER", "").split(",") if code.strip()
+}
+
+
+def response_strategy(lang):
+    if lang != "en" and lang in TRANSLATE_AFTER:
+        return TRANSLATE
+    return NATIVE
+
+
+def with_response_language(system_instruction, lang):
+    """
+    Extend the system instruction so the model replies in lang.
+    """
+    name = LANGUAGE_NAMES.get(lang, lang)
+    rule = (
+        f"Always write your reply in {name}, whatever language the conversation "
+        f"so far is in. Keep names of offices and documents recognisable."
+    )
+    if not system_instruction:
+        return rule
+    return f"{system_instruction}\n\n{rule}"
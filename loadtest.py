@@ -0,0 +1,341 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ----------------------------
+# Concurrent-Session Load Test
+# ----------------------------
+# Simulates N users holding multi-turn conversations at the same time - quick
+# question clicks and free-text prompts in every supported language - and
+# reports time-to-first-token, full-reply latency, translation latency and
+# throughput at p50/p95/p99 as JSON, so runs can be compared over time.
+#
+# Against the headless core in this process, with the stand-in backends
+# from mock_services.py started automatically:
+#
+#   python loadtest.py --users 50 --turns 4 --mock --output run.json
+#
+# Against a running API server (start it pointed at the stand-ins, see
+# mock_services.py):
+#
+#   python loadtest.py --users 50 --turns 4 --target http://127.0.0.1:8000
+
+FREE_TEXT_PROMPTS = {
+    "en": [
+        "My manager keeps taking credit for my work. What can I do?",
+        "Is it confidential if I talk to the Ombudsman?",
+        "A colleague shouts at me in meetings and I feel anxious.",
+    ],
+    "ar": [
+        "مديري ينسب عملي إلى نفسه. ماذا يمكنني أن أفعل؟",
+        "هل حديثي مع أمين المظالم سري؟",
+    ],
+    "fr": [
+        "Mon responsable s'attribue mon travail. Que puis-je faire ?",
+        "Est-ce que mes échanges avec l'Ombudsman sont confidentiels ?",
+    ],
+    "es": [
+        "Mi jefe se atribuye mi trabajo. ¿Qué puedo hacer?",
+        "¿Es confidencial hablar con el Ombudsman?",
+    ],
+    "zh": [
+        "我的经理总是把我的工作据为己有，我该怎么办？",
+        "和监察员谈话是保密的吗？",
+    ],
+    "uk": [
+        "Мій керівник привласнює мою роботу. Що мені робити?",
+        "Чи конфіденційна розмова з омбудсменом?",
+    ],
+}
+
+# Share of turns that are quick-question clicks rather than typed prompts.
+QUICK_QUESTION_SHARE = 0.4
+
+
+def percentiles(values):
+    """
+    Return p50/p95/p99 (nearest rank), mean and max of values in one dict.
+    """
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+    return {
+        "count": len(ordered),
+        "p50": round(rank(50), 1),
+        "p95": round(rank(95), 1),
+        "p99": round(rank(99), 1),
+        "mean": round(sum(ordered) / len(ordered), 1),
+        "max": round(ordered[-1], 1),
+    }
+
+
+class InProcessBackend:
+    """
+    Drives assistant.Turn directly, one thread per in-flight turn.
+    """
+
+    def __init__(self):
+        import assistant
+        self.assistant = assistant
+
+    async def new_session(self):
+        session = await asyncio.to_thread(self.assistant.new_session)
+        return session.token
+
+    def _chat(self, token, prompt, language):
+        record = {"started": time.perf_counter()}
+        session = self.assistant.get_session(token)
+        turn = self.assistant.Turn(session, prompt, language)
+        for piece in turn:
+            if "first_token" not in record:
+                record["first_token"] = time.perf_counter()
+        turn.finish()
+        record["finished"] = time.perf_counter()
+        record["chars"] = len(turn.reply)
+        record["timings"] = turn.timings
+        record["cached"] = turn.cache_hit
+        record["faq"] = turn.faq is not None
+        return record
+
+    async def chat(self, token, prompt, language):
+        return await asyncio.to_thread(self._chat, token, prompt, language)
+
+    async def close(self):
+        pass
+
+
+class HttpBackend:
+    """
+    Talks to api.py over HTTP and reads its server-sent events.
+    """
+
+    def __init__(self, base_url, timeout=120):
+        import httpx
+        self.client = httpx.AsyncClient(base_url=base_url, timeout=timeout)
+
+    async def new_session(self):
+        response = await self.client.post("/sessions")
+        response.raise_for_status()
+        return response.json()["session"]
+
+    async def chat(self, token, prompt, language):
+        record = {"started": time.perf_counter(), "chars": 0}
+        body = {"session": token, "message": prompt, "language": language}
+        async with self.client.stream("POST", "/chat", json=body) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+            event = None
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    data = json.loads(line[len("data: "):])
+                    if event == "delta":
+                        record.setdefault("first_token", time.perf_counter())
+                    elif event == "done":
+                        record["chars"] = len(data["reply"])
+                        record["timings"] = data.get("timings") or {}
+                        record["cached"] = data.get("cached", False)
+                        record["faq"] = bool(data.get("faq"))
+                    elif event == "error":
+                        raise RuntimeError(data["error"])
+        record["finished"] = time.perf_counter()
+        return record
+
+    async def close(self):
+        await self.client.aclose()
+
+
+async def run_user(backend, user_id, args, rng, results):
+    # Each simulated user sticks to one language, as people do.
+    language = list(FREE_TEXT_PROMPTS)[user_id % len(FREE_TEXT_PROMPTS)]
+    await asyncio.sleep(rng.uniform(0, args.ramp_seconds))
+    try:
+        token = await backend.new_session()
+    except Exception as e:
+        results.append({"user": user_id, "turn": 0, "language": language, "error": f"session: {e}"})
+        return
+
+    from assistant import QUICK_QUESTIONS
+    quick = list(QUICK_QUESTIONS.values())
+    for turn in range(args.turns):
+        if rng.random() < QUICK_QUESTION_SHARE:
+            kind, prompt = "quick", rng.choice(quick)
+        else:
+            kind, prompt = "free", rng.choice(FREE_TEXT_PROMPTS[language])
+        entry = {"user": user_id, "turn": turn, "language": language, "kind": kind}
+        try:
+            record = await backend.chat(token, prompt, language)
+        except Exception as e:
+            entry["error"] = str(e)
+            results.append(entry)
+            return
+        entry["ttft_ms"] = (record.get("first_token", record["finished"]) - record["started"]) * 1000
+        entry["reply_ms"] = (record["finished"] - record["started"]) * 1000
+        entry["chars"] = record["chars"]
+        entry["cached"] = record.get("cached", False)
+        entry["faq"] = record.get("faq", False)
+        timings = record.get("timings") or {}
+        entry["translate_input_ms"] = timings.get("translate_input_ms", 0.0)
+        entry["translate_reply_ms"] = timings.get("translate_reply_ms", 0.0)
+        results.append(entry)
+        await asyncio.sleep(rng.uniform(0, 2 * args.think_ms) / 1000)
+
+
+def summarize(results, wall_seconds, args):
+    ok = [r for r in results if "error" not in r]
+    errors = [r for r in results if "error" in r]
+
+    def metrics(rows):
+        return {
+            "ttft_ms": percentiles([r["ttft_ms"] for r in rows]),
+            "reply_ms": percentiles([r["reply_ms"] for r in rows]),
+            "translation_ms": percentiles([r["translate_input_ms"] + r["translate_reply_ms"] for r in rows]),
+            "translate_input_ms": percentiles([r["translate_input_ms"] for r in rows]),
+            "translate_reply_ms": percentiles([r["translate_reply_ms"] for r in rows]),
+        }
+
+    return {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() - wall_seconds)),
+        "config": {
+            "mode": "http" if args.target else "in-process",
+            "target": args.target,
+            "users": args.users,
+            "turns": args.turns,
+            "think_ms": args.think_ms,
+            "ramp_seconds": args.ramp_seconds,
+            "seed": args.seed,
+        },
+        "wall_seconds": round(wall_seconds, 3),
+        "turns_completed": len(ok),
+        "errors": len(errors),
+        "faq_answers": sum(1 for r in ok if r["faq"]),
+        "response_cache_hits": sum(1 for r in ok if r["cached"]),
+        "error_samples": sorted({r["error"] for r in errors})[:5],
+        "throughput": {
+            "turns_per_second": round(len(ok) / wall_seconds, 2) if wall_seconds else 0.0,
+            "chars_per_second": round(sum(r["chars"] for r in ok) / wall_seconds, 1) if wall_seconds else 0.0,
+        },
+        **metrics(ok),
+        "by_language": {
+            lang: metrics([r for r in ok if r["language"] == lang])
+            for lang in FREE_TEXT_PROMPTS if any(r["language"] == lang for r in ok)
+        },
+    }
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_mock_services(extra_args):
+    """
+    Start mock_services.py on a free port and point this process at it.
+    """
+    port = _free_port()
+    here = os.path.dirname(os.path.abspath(__file__))
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(here, "mock_services.py"), "--port", str(port), *extra_args],
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    else:
+        process.terminate()
+        raise RuntimeError("mock services did not start")
+
+    base = f"http://127.0.0.1:{port}"
+    os.environ["OMBUDS_GEMINI_BASE_URL"] = base
+    os.environ["OMBUDS_TRANSLATOR_URL"] = f"{base}/translate/m"
+    os.environ.setdefault("GEMINI_API_KEY", "mock")
+    # Keep load-test sessions out of the real state database.
+    os.environ.setdefault("OMBUDS_STATE_URL", "memory://")
+    return process
+
+
+async def run(args):
+    backend = HttpBackend(args.target) if args.target else InProcessBackend()
+    rng = random.Random(args.seed)
+    results = []
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            run_user(backend, user_id, args, random.Random(rng.random()), results)
+            for user_id in range(args.users)
+        ))
+    finally:
+        await backend.close()
+    return summarize(results, time.perf_counter() - started, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the assistant.")
+    parser.add_argument("--users", type=int, default=20, help="simultaneous conversations")
+    parser.add_argument("--turns", type=int, default=3, help="messages per conversation")
+    parser.add_argument("--think-ms", type=float, default=500, help="mean pause between a user's turns")
+    parser.add_argument("--ramp-seconds", type=float, default=2, help="spread user start times over this long")
+    parser.add_argument("--target", help="base URL of a running api.py; default drives the core in-process")
+    parser.add_argument("--mock", action="store_true", help="start mock_services.py and use it (in-process only)")
+    parser.add_argument("--mock-args", default="", help='extra mock_services.py flags, e.g. "--ttft-ms 600"')
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    if args.users < 1 or args.turns < 1:
+        parser.error("--users and --turns must be at least 1")
+    if args.mock and args.target:
+        parser.error("--mock drives the core in-process; start api.py against mock_services.py instead")
+    if not args.target:
+        # Simulated users type faster than people; keep the per-session rate
+        # limit from cutting conversations short.
+        os.environ.setdefault("OMBUDS_RATE_LIMIT_PER_MINUTE", str(max(20, args.turns * 2)))
+
+    mock = start_mock_services(args.mock_args.split()) if args.mock else None
+    try:
+        loop = asyncio.new_event_loop()
+        # In-process turns each hold a thread until the reply is complete.
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=args.users + 4))
+        report = loop.run_until_complete(run(args))
+        loop.close()
+    finally:
+        if mock is not None:
+            mock.terminate()
+            mock.wait()
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    print(
+        f"{report['turns_completed']} turns, {report['errors']} errors in {report['wall_seconds']}s | "
+        f"TTFT p50/p95/p99 {report['ttft_ms'].get('p50')}/{report['ttft_ms'].get('p95')}/"
+        f"{report['ttft_ms'].get('p99')} ms | reply p50/p95/p99 {report['reply_ms'].get('p50')}/"
+        f"{report['reply_ms'].get('p95')}/{report['reply_ms'].get('p99')} ms",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import json
+import os
+import sys
+import threading
+import uuid
+import weakref
+
+# ----------------------------
+# Session Message Store
+# ----------------------------
+# Messages are small slotted records rather than free-form dicts: the role is
+# interned, and the canonical (model-side) text is only stored when it differs
+# from the displayed text. Each session's store keeps its most recent messages
+# in memory up to a byte cap; older turns are appended to a per-session file on
+# disk and read back only when something (e.g. "load earlier messages") asks
+# for them. The system message is always kept in memory.
+SESSION_MAX_BYTES = int(os.getenv("OMBUDS_SESSION_MAX_BYTES", str(256 * 1024)))
+SESSION_MIN_IN_MEMORY = int(os.getenv("OMBUDS_SESSION_MIN_IN_MEMORY", "12"))
+SESSION_OFFLOAD_DIR = os.getenv("OMBUDS_SESSION_OFFLOAD_DIR", ".cache/sessions")
+
+_RECORD_OVERHEAD = sys.getsizeof(object()) + 4 * 8
+
+
+class Message:
+    __slots__ = ("role", "content", "_canonical", "meta")
+
+    def __init__(self, role, content, canonical=None, meta=None):
+        self.role = sys.intern(role)
+        self.content = content
+        # Stored once when the model saw exactly what the user sees.
+        self._canonical = None if canonical is None or canonical == content else canonical
+        self.meta = meta
+
+    @property
+    def canonical(self):
+        return self.content if self._canonical is None else self._canonical
+
+    def size(self):
+        """
+        Approximate bytes held by this record.
+        """
+        size = _RECORD_OVERHEAD + sys.getsizeof(self.content)
+        if self._canonical is not None:
+            size += sys.getsizeof(self._canonical)
+        if self.meta:
+            size += sys.getsizeof(self.meta) + len(json.dumps(self.meta))
+        return size
+
+    def to_dict(self):
+        data = {"role": self.role, "content": self.content}
+        if self._canonical is not None:
+            data["canonical"] = self._canonical
+        if self.meta:
+            data["meta"] = self.meta
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["role"], data["content"], data.get("canonical"), data.get("meta"))
+
+    def __repr__(self):
+        return f"Message({self.role!r}, {self.content[:30]!r})"
+
+
+_stores = weakref.WeakSet()
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class MessageStore:
+    """
+    List-like conversation history (len, indexing, slicing, iteration)
+    with a per-session memory cap.
+    """
+
+    PINNED = 1  # the system message
+
+    def __init__(self, messages=(), max_bytes=SESSION_MAX_BYTES, min_in_memory=SESSION_MIN_IN_MEMORY,
+                 offload_dir=SESSION_OFFLOAD_DIR, session_id=None):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.max_bytes = max_bytes
+        self.min_in_memory = min_in_memory
+        self.offload_path = os.path.join(offload_dir, f"{self.session_id}.jsonl")
+
+        self._head = []
+        self._tail = []
+        self._offloaded = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        for msg in messages:
+            self.append(msg)
+        _stores.add(self)
+        # Offloaded turns are only useful while the session is alive.
+        weakref.finalize(self, _remove_file, self.offload_path)
+
+    def __len__(self):
+        return len(self._head) + self._offloaded + len(self._tail)
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self._get(i) for i in range(start, stop, step)]
+            return self._range(start, stop)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("message index out of range")
+        return self._get(index)
+
+    def _get(self, index):
+        if index < len(self._head):
+            return self._head[index]
+        index -= len(self._head)
+        if index < self._offloaded:
+            return self._read_offloaded(index, index + 1)[0]
+        return self._tail[index - self._offloaded]
+
+    def append(self, msg):
+        with self._lock:
+            if len(self._head) < self.PINNED:
+                self._head.append(msg)
+                return
+            self._tail.append(msg)
+            self._bytes += msg.size()
+            if self._bytes > self.max_bytes:
+                self._offload()
+
+    def _offload(self):
+        # Offload down to three quarters of the cap so we do not hit disk on
+        # every append once the cap is reached.
+        target = self.max_bytes * 3 // 4
+        moved = []
+        while self._bytes > target and len(self._tail) > self.min_in_memory:
+            msg = self._tail.pop(0)
+            self._bytes -= msg.size()
+            moved.append(msg)
+        if not moved:
+            return
+        os.makedirs(os.path.dirname(self.offload_path) or ".", exist_ok=True)
+        with open(self.offload_path, "a", encoding="utf-8") as f:
+            for msg in moved:
+                f.write(json.dumps(msg.to_dict(), ensure_ascii=False) + "\n")
+        self._offloaded += len(moved)
+
+    def _range(self, start, stop):
+        pinned = len(self._head)
+        result = self._head[start:stop]
+        first, last = max(start - pinned, 0), min(stop - pinned, self._offloaded)
+        if first < last:
+            result.extend(self._read_offloaded(first, last))
+        result.extend(self._tail[max(start - pinned - self._offloaded, 0):max(stop - pinned - self._offloaded, 0)])
+        return result
+
+    def _read_offloaded(self, first, last):
+        messages = []
+        with open(self.offload_path, encoding="utf-8") as f:
+            for i, line in enumerate(f):
+                if i >= last:
+                    break
+                if i >= first:
+                    messages.append(Message.from_dict(json.loads(line)))
+        if len(messages) != last - first:
+            raise IndexError("offloaded messages missing")
+        return messages
+
+    def memory_bytes(self):
+        head = sum(msg.size() for msg in self._head)
+        return head + self._bytes
+
+    def report(self):
+        return {
+            "session_id": self.session_id,
+            "messages": len(self),
+            "in_memory": len(self._head) + len(self._tail),
+            "offloaded": self._offloaded,
+            "memory_bytes": self.memory_bytes(),
+        }
+
+
+def memory_report(per_session=True):
+    """
+    Bytes held by every live session store in this process.
+    """
+    reports = [store.report() for store in list(_stores)]
+    report = {
+        "sessions": len(reports),
+        "total_bytes": sum(r["memory_bytes"] for r in reports),
+    }
+    if per_session:
+        report["per_session"] = reports
+    return report
@@ -0,0 +1,254 @@
+import argparse
+import asyncio
+import html
+import json
+import os
+import random
+import time
+import uuid
+
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse, JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+# ----------------------------
+# Local Stand-in Services
+# ----------------------------
+# One ASGI app that imitates the three external services the assistant uses,
+# so it can be run and benchmarked without API keys or network access:
+#   Gemini     POST /{version}/models/{model}:streamGenerateContent?alt=sse
+#              POST /{version}/models/{model}:generateContent
+#              POST /{version}/cachedContents
+#   Groq       POST /openai/v1/chat/completions   (OpenAI-compatible, optional stream)
+#   Translator GET  /translate/m?sl=&tl=&q=      (the page GoogleTranslator scrapes)
+#
+#   python mock_services.py --port 8900 --ttft-ms 400 --tokens-per-second 80
+#
+# and point the app at it:
+#   OMBUDS_GEMINI_BASE_URL=http://127.0.0.1:8900
+#   OMBUDS_TRANSLATOR_URL=http://127.0.0.1:8900/translate/m
+#   GROQ_API_URL=http://127.0.0.1:8900/openai/v1/chat/completions
+#   GEMINI_API_KEY=mock GROQ_API_KEY=mock
+#
+# Every setting can also be given as OMBUDS_MOCK_<NAME> in the environment.
+
+REPLY_TEXT = (
+    "Thank you for reaching out to the Office of the Ombudsman and Mediator. "
+    "Workplace conflicts are common, and there are several informal options. "
+    "You can speak with the person directly, ask a trusted colleague for advice, "
+    "or contact the Ombudsman for a confidential conversation.\n\n"
+    "- Describe the situation factually and note the dates involved.\n"
+    "- Consider whether mediation could help both sides be heard.\n"
+    "- Remember that conversations with the Ombudsman are confidential and impartial.\n\n"
+    "If you would like, I can explain how mediation works or how to file a formal grievance."
+)
+
+
+class MockSettings:
+    def __init__(self, ttft_ms=300.0, tokens_per_second=60.0, chunk_tokens=6, reply_tokens=120,
+                 error_rate=0.0, rate_limit_rate=0.0, translate_latency_ms=120.0, seed=None):
+        self.ttft_ms = ttft_ms
+        self.tokens_per_second = tokens_per_second
+        self.chunk_tokens = chunk_tokens
+        self.reply_tokens = reply_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.translate_latency_ms = translate_latency_ms
+        self.random = random.Random(seed)
+
+    @classmethod
+    def from_env(cls, **overrides):
+        defaults = cls()
+        values = {}
+        for name in ("ttft_ms", "tokens_per_second", "chunk_tokens", "reply_tokens",
+                     "error_rate", "rate_limit_rate", "translate_latency_ms"):
+            raw = os.getenv(f"OMBUDS_MOCK_{name.upper()}")
+            current = getattr(defaults, name)
+            values[name] = type(current)(raw) if raw is not None else current
+        values.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**values)
+
+    def failure(self):
+        """
+        Return (status, message) for an injected failure, or None.
+        """
+        roll = self.random.random()
+        if roll < self.rate_limit_rate:
+            return 429, "Resource has been exhausted (mock rate limit)."
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 500, "Internal error (mock)."
+        return None
+
+
+def reply_tokens(settings):
+    words = REPLY_TEXT.replace("\n", " \n").split(" ")
+    tokens = []
+    while len(tokens) < settings.reply_tokens:
+        tokens.extend(word + " " if not word.endswith("\n") else word for word in words)
+    return tokens[:settings.reply_tokens]
+
+
+async def stream_chunks(settings):
+    """
+    Yield reply text chunks paced by the configured TTFT and token rate.
+    """
+    tokens = reply_tokens(settings)
+    await asyncio.sleep(settings.ttft_ms / 1000)
+    step = max(settings.chunk_tokens, 1)
+    for i in range(0, len(tokens), step):
+        if i:
+            await asyncio.sleep(step / settings.tokens_per_second)
+        yield "".join(tokens[i:i + step])
+
+
+def _gemini_error(status, message):
+    names = {429: "RESOURCE_EXHAUSTED", 500: "INTERNAL"}
+    return JSONResponse({"error": {"code": status, "message": message, "status": names[status]}},
+                        status_code=status)
+
+
+def _gemini_response(text, model, finished=False, prompt_tokens=0, output_tokens=0):
+    candidate = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+    if finished:
+        candidate["finishReason"] = "STOP"
+    return {
+        "candidates": [candidate],
+        "modelVersion": model,
+        "usageMetadata": {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_tokens + output_tokens,
+        },
+    }
+
+
+async def _prompt_tokens(request):
+    body = await request.body()
+    return len(body) // 4
+
+
+async def gemini_models(request):
+    settings = request.app.state.settings
+    model, _, method = request.path_params["target"].partition(":")
+
+    failure = settings.failure()
+    if failure:
+        return _gemini_error(*failure)
+    prompt_tokens = await _prompt_tokens(request)
+
+    if method == "generateContent":
+        text = "".join([chunk async for chunk in stream_chunks(settings)])
+        return JSONResponse(_gemini_response(text, model, True, prompt_tokens, settings.reply_tokens))
+
+    if method == "streamGenerateContent":
+        async def events():
+            sent = 0
+            async for chunk in stream_chunks(settings):
+                sent += settings.chunk_tokens
+                data = _gemini_response(chunk, model, False, prompt_tokens, sent)
+                yield f"data: {json.dumps(data)}\r\n\r\n"
+            data = _gemini_response("", model, True, prompt_tokens, settings.reply_tokens)
+            yield f"data: {json.dumps(data)}\r\n\r\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return JSONResponse({"error": {"code": 404, "message": f"unknown method {method}"}}, status_code=404)
+
+
+async def gemini_cached_contents(request):
+    body = await request.json()
+    ttl = float(str(body.get("ttl", "3600s")).rstrip("s"))
+    expire = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + ttl))
+    return JSONResponse({
+        "name": f"cachedContents/mock-{uuid.uuid4().hex[:12]}",
+        "model": body.get("model"),
+        "displayName": body.get("displayName", ""),
+        "expireTime": expire,
+    })
+
+
+async def groq_chat_completions(request):
+    settings = request.app.state.settings
+    body = await request.json()
+    model = body.get("model", "mock")
+
+    failure = settings.failure()
+    if failure:
+        status, message = failure
+        kind = "rate_limit_exceeded" if status == 429 else "internal_error"
+        return JSONResponse({"error": {"message": message, "type": kind}}, status_code=status)
+
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    if body.get("stream"):
+        async def events():
+            async for chunk in stream_chunks(settings):
+                data = {"id": completion_id, "object": "chat.completion.chunk", "model": model,
+                        "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]}
+                yield f"data: {json.dumps(data)}\n\n"
+            data = {"id": completion_id, "object": "chat.completion.chunk", "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+            yield f"data: {json.dumps(data)}\n\ndata: [DONE]\n\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    text = "".join([chunk async for chunk in stream_chunks(settings)])
+    prompt_tokens = await _prompt_tokens(request)
+    return JSONResponse({
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": settings.reply_tokens,
+                  "total_tokens": prompt_tokens + settings.reply_tokens},
+    })
+
+
+async def translate_page(request):
+    settings = request.app.state.settings
+    failure = settings.failure()
+    if failure:
+        return HTMLResponse("<html><body>error</body></html>", status_code=failure[0])
+    await asyncio.sleep(settings.translate_latency_ms / 1000)
+    target = request.query_params.get("tl", "en")
+    text = request.query_params.get("q", "")
+    # Deterministic "translation": tag the text with the target language.
+    translated = html.escape(f"[{target}] {text}")
+    return HTMLResponse(f'<html><body><div class="result-container">{translated}</div></body></html>')
+
+
+def create_app(settings=None):
+    app = Starlette(routes=[
+        Route("/{version}/models/{target:path}", gemini_models, methods=["POST"]),
+        Route("/{version}/cachedContents", gemini_cached_contents, methods=["POST"]),
+        Route("/openai/v1/chat/completions", groq_chat_completions, methods=["POST"]),
+        Route("/translate/m", translate_page),
+    ])
+    app.state.settings = settings or MockSettings.from_env()
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-ins for Gemini, Groq and the translator.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--ttft-ms", type=float)
+    parser.add_argument("--tokens-per-second", type=float)
+    parser.add_argument("--chunk-tokens", type=int)
+    parser.add_argument("--reply-tokens", type=int)
+    parser.add_argument("--error-rate", type=float, help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, help="fraction of requests answered with HTTP 429")
+    parser.add_argument("--translate-latency-ms", type=float)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    settings = MockSettings.from_env(
+        ttft_ms=args.ttft_ms, tokens_per_second=args.tokens_per_second, chunk_tokens=args.chunk_tokens,
+        reply_tokens=args.reply_tokens, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+        translate_latency_ms=args.translate_latency_ms, seed=args.seed,
+    )
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+# ----------------------------
+# Session Recording
+# ----------------------------
+# Opt-in capture of real conversations as replayable fixtures (see replay.py):
+# the prompt and language, when each Gemini chunk arrived, and how long every
+# translation call took. Set OMBUDS_RECORD_DIR to switch it on; each session
+# becomes one JSONL file there, one line per turn.
+#
+# Turns answered from the FAQ or the response cache are recorded too, tagged
+# as such, so a replay rebuilds the same conversation history.
+#
+# Fixtures are anonymized before they are written: the session token is
+# hashed, and e-mail addresses, URLs, phone numbers, other digit runs,
+# capitalised words inside a sentence or after a title (names, places,
+# organisations) and acronyms are replaced by placeholders in every recorded
+# text. Lower-case names, names opening a sentence and scripts without
+# capitals are not detected, so review fixtures before sharing them.
+RECORD_DIR = os.getenv("OMBUDS_RECORD_DIR")
+# Share of sessions recorded (whole sessions are kept or skipped).
+RECORD_SAMPLE_RATE = float(os.getenv("OMBUDS_RECORD_SAMPLE_RATE", "1.0"))
+
+_SCRUB_PATTERNS = [
+    (re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"), "[EMAIL]"),
+    (re.compile(r"https?://\S+|www\.\S+"), "[URL]"),
+    (re.compile(r"\+?\d[\d ()./-]{6,}\d"), "[PHONE]"),
+    (re.compile(r"\d{3,}"), "[NUMBER]"),
+    (re.compile(r"\b(?:Mr|Mrs|Ms|Miss|Mx|Dr|Prof)\.?\s+[^\W\d_]+"), "[NAME]"),
+]
+# A word made of letters, with any apostrophes or hyphens inside it.
+_WORD = re.compile(r"[^\W\d_]+(?:['’-][^\W\d_]+)*")
+# Capitalised words that are not personal details.
+_KEEP_CAPITALISED = {"I", "Ombudsman", "Ombuds", "Mediator", "Mediation", "Office"}
+_NAME_RUN = re.compile(r"\[NAME\](?:[ -]\[NAME\])+")
+
+_write_lock = threading.Lock()
+
+
+def scrub(text):
+    """
+    Replace personal details that can be spotted mechanically with placeholders.
+    """
+    for pattern, placeholder in _SCRUB_PATTERNS:
+        text = pattern.sub(placeholder, text)
+    return _NAME_RUN.sub("[NAME]", _WORD.sub(lambda match: _scrub_word(text, match), text))
+
+
+def _scrub_word(text, match):
+    word = match.group()
+    if text[match.start() - 1:match.start()] == "[":
+        return word  # a placeholder
+    if not word[0].isupper() or re.split(r"['’]", word)[0] in _KEEP_CAPITALISED:
+        return word
+    if len(word) > 1 and word.isupper():
+        return "[ORG]"
+    # The first word of a sentence is capitalised anyway.
+    before = text[:match.start()].rstrip(" \t\"'“‘(")
+    if not before or before[-1] in ".!?:;\n¿¡":
+        return word
+    return "[NAME]"
+
+
+def session_id(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+
+def should_record(token):
+    if not RECORD_DIR or RECORD_SAMPLE_RATE <= 0:
+        return False
+    # Decided from the token, so a session is recorded completely or not at all.
+    return int(session_id(token), 16) / 16 ** 16 < RECORD_SAMPLE_RATE
+
+
+class TimedTranslation:
+    """
+    Stand-in for the translation service that times every translate() call.
+    """
+
+    def __init__(self, service, calls):
+        self.service = service
+        self.executor = service.executor
+        self.calls = calls
+
+    def translate(self, text, target, source="auto"):
+        started = time.perf_counter()
+        translated = self.service.translate(text, target, source)
+        self.calls.append([text, target, round((time.perf_counter() - started) * 1000, 2)])
+        return translated
+
+
+class TurnRecording:
+    def __init__(self, prompt, target_lang, strategy):
+        self.prompt = prompt
+        self.target_lang = target_lang
+        self.strategy = strategy
+        self.started = time.perf_counter()
+
+        self.request_sent = None
+        self.first_piece = None
+        # [ms after the Gemini request was sent, chunk length]
+        self.chunks = []
+        self.translations = []
+
+    def translation(self, service):
+        return TimedTranslation(service, self.translations)
+
+    def sent(self):
+        self.request_sent = time.perf_counter()
+
+    def chunk(self, text):
+        self.chunks.append([round((time.perf_counter() - self.request_sent) * 1000, 2), len(text)])
+
+    def piece(self):
+        if self.first_piece is None:
+            self.first_piece = time.perf_counter()
+
+    def save(self, token, turn_index, model, canonical, faq=None, cached=False):
+        """
+        Append this turn to the session's fixture file.
+        """
+        finished = time.perf_counter()
+        record = {
+            "turn": turn_index,
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "model": model,
+            "language": self.target_lang,
+            "strategy": self.strategy,
+            # The FAQ intent or response cache that answered instead of Gemini.
+            "faq": faq,
+            "cached": cached,
+            "prompt": scrub(self.prompt),
+            # The scrubbed reply; chunk lengths refer to the original text,
+            # so the replayer re-slices this and gives any difference to the
+            # last chunk.
+            "reply": scrub(canonical),
+            "chunks": self.chunks,
+            "translations": [[scrub(text), target, ms] for text, target, ms in self.translations],
+            "ttft_ms": round(((self.first_piece or finished) - self.started) * 1000, 2),
+            "reply_ms": round((finished - self.started) * 1000, 2),
+        }
+        path = os.path.join(RECORD_DIR, f"{session_id(token)}.jsonl")
+        line = json.dumps(record, ensure_ascii=False)
+        with _write_lock:
+            os.makedirs(RECORD_DIR, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+def load_fixture(path):
+    """
+    Return the recorded turns of one session fixture, in order.
+    """
+    with open(path, encoding="utf-8") as f:
+        turns = [json.loads(line) for line in f if line.strip()]
+    return sorted(turns, key=lambda turn: turn["turn"])
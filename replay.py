@@ -0,0 +1,245 @@
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ----------------------------
+# Session Replay
+# ----------------------------
+# Feeds fixtures captured by recorder.py back through the assistant core with
+# their recorded timing profile: Gemini chunks arrive at the recorded offsets
+# and every translator call takes as long as it did when recorded. Replaying
+# the same fixture before and after a change shows what the change did to
+# real-shaped traffic:
+#
+#   python replay.py fixtures/ --output before.json
+#   python replay.py fixtures/ --output after.json --compare before.json
+#
+# Gemini and the translator are replaced in-process, so no keys or network
+# access are needed. Sessions live in an in-memory state store unless
+# OMBUDS_STATE_URL says otherwise.
+os.environ.setdefault("OMBUDS_STATE_URL", "memory://")
+os.environ.setdefault("GEMINI_API_KEY", "replay")
+# Replayed turns are not recorded again.
+os.environ.pop("OMBUDS_RECORD_DIR", None)
+
+import clients  # noqa: E402
+import languages  # noqa: E402
+import translation  # noqa: E402
+from loadtest import percentiles  # noqa: E402
+from recorder import load_fixture  # noqa: E402
+from state_store import MemoryStore  # noqa: E402
+
+# Latency for a translator call the fixture has no timing for.
+DEFAULT_TRANSLATE_MS = 150.0
+
+_script = threading.local()
+
+
+def _chunk_texts(turn):
+    """
+    Re-slice the recorded reply into the recorded chunk sizes.
+    """
+    reply = turn["reply"]
+    if not turn["chunks"]:
+        # Answered from the FAQ or the response cache when recorded; should
+        # the replay reach Gemini instead, it answers the same, at once.
+        return [(0.0, reply)]
+    chunks = []
+    position = 0
+    for i, (offset_ms, length) in enumerate(turn["chunks"]):
+        end = len(reply) if i == len(turn["chunks"]) - 1 else min(len(reply), position + length)
+        chunks.append((offset_ms, reply[position:end]))
+        position = end
+    return chunks
+
+
+class ReplayChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class ReplayModels:
+    def __init__(self, speed):
+        self.speed = speed
+
+    def generate_content_stream(self, model, config, contents):
+        turn = _script.turn
+        sent = time.perf_counter()
+        for offset_ms, text in _chunk_texts(turn):
+            delay = offset_ms / 1000 / self.speed - (time.perf_counter() - sent)
+            if delay > 0:
+                time.sleep(delay)
+            yield ReplayChunk(text)
+
+    def generate_content(self, model, config, contents):
+        # Rolling summaries: no recorded timing, answer at once.
+        return ReplayChunk("")
+
+
+class ReplayCache:
+    name = "cachedContents/replay"
+
+
+class ReplayCaches:
+    def create(self, model, config):
+        return ReplayCache()
+
+
+class ReplayClient:
+    """
+    Gemini client whose streams play back the current thread's recorded turn.
+    """
+
+    def __init__(self, speed):
+        self.models = ReplayModels(speed)
+        self.caches = ReplayCaches()
+
+
+class ReplayTranslator:
+    def __init__(self, target, latencies, speed):
+        self.target = target
+        self.latencies = latencies
+        self.speed = speed
+
+    def translate(self, text):
+        ms = self.latencies.get((text, self.target), self.latencies.get(None, DEFAULT_TRANSLATE_MS))
+        time.sleep(ms / 1000 / self.speed)
+        return f"[{self.target}] {text}"
+
+
+class ReplayTranslationService(translation.TranslationService):
+    """
+    Translation service whose network calls take as long as the recorded ones.
+    Caching works as usual, starting cold.
+    """
+
+    def __init__(self, latencies, speed):
+        super().__init__(
+            store=MemoryStore(),
+            translator_factory=lambda source, target: ReplayTranslator(target, latencies, speed),
+        )
+
+
+def translation_latencies(fixtures):
+    """
+    Map (text, target) to the slowest recorded call, i.e. the one that reached
+    the translator rather than the cache. None maps to the median such call.
+    """
+    latencies = {}
+    for turns in fixtures.values():
+        for turn in turns:
+            for text, target, ms in turn["translations"]:
+                latencies[(text, target)] = max(ms, latencies.get((text, target), 0.0))
+    fetched = [ms for ms in latencies.values() if ms >= 5]
+    latencies[None] = statistics.median(fetched) if fetched else DEFAULT_TRANSLATE_MS
+    return latencies
+
+
+def replay_session(name, turns):
+    import assistant
+
+    session = assistant.new_session()
+    results = []
+    for recorded in turns:
+        _script.turn = recorded
+        started = time.perf_counter()
+        first_piece = None
+        turn = assistant.Turn(session, recorded["prompt"], recorded["language"])
+        for _ in turn:
+            if first_piece is None:
+                first_piece = time.perf_counter()
+        turn.finish()
+        finished = time.perf_counter()
+        results.append({
+            "fixture": name,
+            "turn": recorded["turn"],
+            "language": recorded["language"],
+            "faq": recorded.get("faq"),
+            "cached": recorded.get("cached", False),
+            "recorded": {"ttft_ms": recorded["ttft_ms"], "reply_ms": recorded["reply_ms"]},
+            "ttft_ms": round(((first_piece or finished) - started) * 1000, 2),
+            "reply_ms": round((finished - started) * 1000, 2),
+            "translate_input_ms": round(turn.timings["translate_input_ms"], 2),
+            "translate_reply_ms": round(turn.timings["translate_reply_ms"], 2),
+        })
+    return results
+
+
+def summarize(results):
+    return {
+        **{
+            metric: percentiles([r[metric] for r in results])
+            for metric in ("ttft_ms", "reply_ms", "translate_input_ms", "translate_reply_ms")
+        },
+        "recorded_ttft_ms": percentiles([r["recorded"]["ttft_ms"] for r in results]),
+        "recorded_reply_ms": percentiles([r["recorded"]["reply_ms"] for r in results]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded sessions with their recorded timings.")
+    parser.add_argument("paths", nargs="+", help="fixture files (.jsonl) or directories of them")
+    parser.add_argument("--speed", type=float, default=1.0, help="play back this many times faster")
+    parser.add_argument("--concurrency", type=int, default=1, help="sessions replayed at the same time")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--current-strategy", action="store_true",
+                        help="use today's OMBUDS_TRANSLATE_AFTER instead of each turn's recorded reply strategy")
+    parser.add_argument("--compare", help="earlier report to show p50/p95 changes against")
+    args = parser.parse_args()
+
+    files = []
+    for path in args.paths:
+        files.extend(sorted(glob.glob(os.path.join(path, "*.jsonl"))) if os.path.isdir(path) else [path])
+    if not files:
+        parser.error("no fixtures found")
+    fixtures = {os.path.basename(path): load_fixture(path) for path in files}
+
+    if not args.current_strategy:
+        languages.TRANSLATE_AFTER = {
+            turn["language"] for turns in fixtures.values() for turn in turns
+            if turn["strategy"] == languages.TRANSLATE
+        }
+    clients.set_gemini_client(ReplayClient(args.speed))
+    translation.set_translation_service(ReplayTranslationService(translation_latencies(fixtures), args.speed))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        per_session = list(pool.map(lambda item: replay_session(*item), fixtures.items()))
+    results = [result for session in per_session for result in session]
+
+    report = {
+        "fixtures": len(fixtures),
+        "turns": len(results),
+        "speed": args.speed,
+        "concurrency": args.concurrency,
+        "wall_seconds": round(time.perf_counter() - started, 3),
+        **summarize(results),
+        "turn_results": results,
+    }
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            before = json.load(f)
+        report["compared_to"] = args.compare
+        for metric in ("ttft_ms", "reply_ms", "translate_input_ms", "translate_reply_ms"):
+            old, new = before.get(metric, {}), report[metric]
+            for p in ("p50", "p95"):
+                if old.get(p) is not None and new.get(p) is not None:
+                    print(f"{metric:<20} {p}: {old[p]:>9.1f} -> {new[p]:>9.1f} ms", file=sys.stderr)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
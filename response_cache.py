@@ -0,0 +1,288 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from state_store import get_state_store
+from stemming import stem
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Semantic Response Cache
+# ----------------------------
+# Most first messages are one of the quick questions or a close paraphrase of
+# it, and with no history the answer does not depend on anything else. Such
+# answers are kept per reply language and served without calling Gemini when
+# a new first message is similar enough to a cached one.
+#
+# Questions are compared in English (the canonical form every prompt is
+# translated to), as hashed word and character n-gram vectors; a lookup is
+# one NumPy matrix-vector product over all cached questions. Word order is
+# ignored, but what a question asks for is kept as a feature of its own:
+# "how do I file a grievance", "how can I file a grievance" and "grievance
+# filing process?" all ask how, while "when should I file a grievance" wants
+# a different answer.
+#
+# Answers are appended to a list in the shared state store, so every worker
+# serves what any worker cached. The list is namespaced by model and system
+# prompt, so changing either starts a fresh cache. Lists are generations of
+# half of RESPONSE_CACHE_MAX_ENTRIES: when one fills up, the next one starts
+# and the one before it is dropped, so the oldest answers make room for new
+# ones.
+RESPONSE_CACHE_ENABLED = os.getenv("OMBUDS_RESPONSE_CACHE", "1") != "0"
+# Cosine similarity a question needs to reuse a cached answer. Only
+# rewordings ("What's the process to file a grievance?") get this close;
+# adding a detail ("... in Geneva?") or changing who asks does not.
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("OMBUDS_RESPONSE_CACHE_THRESHOLD", "0.93"))
+RESPONSE_CACHE_TTL_DAYS = int(os.getenv("OMBUDS_RESPONSE_CACHE_TTL_DAYS", "7"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("OMBUDS_RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+VECTOR_DIMENSIONS = 2048
+
+# Words that carry no meaning for matching.
+_STOPWORDS = frozenset("""
+a an the and or of to in on at for with about from by as is are was were be been being am
+i me my we our you your it its this that these those there here
+please hi hello tell explain know want need like get some any just also so if
+""".split())
+
+# What a question asks for, from its first question word or modal; the
+# auxiliaries themselves are dropped, so "how do I" and "how can I" agree.
+_QUESTION_KINDS = {
+    "how": "how", "what": "what", "which": "what", "when": "when", "where": "where",
+    "who": "who", "whom": "who", "whose": "who", "why": "why",
+    "should": "should", "must": "should", "can": "can", "could": "can", "may": "can", "might": "can",
+}
+_AUXILIARIES = frozenset("do does did will would shall".split())
+# Words that ask how something is done, wherever they stand.
+_HOW_WORDS = frozenset("process processes procedure procedures step steps way ways".split())
+QUESTION_KIND_WEIGHT = 1.0
+
+# Negations flip the meaning of a question, so they weigh heavily.
+_NEGATIONS = frozenset({"not", "no", "never", "without", "nobody", "nothing"})
+NEGATION_WEIGHT = 3.0
+
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def _words(text):
+    text = text.lower().replace("n't", " not").replace("n’t", " not").replace("'s", "").replace("’s", "")
+    return [word for word in _WORD.findall(text) if word not in _STOPWORDS]
+
+
+def normalize(text):
+    """
+    Lowercased, stemmed content words of text.
+    """
+    return [stem(word) for word in _words(text)]
+
+
+def _bucket(feature):
+    return zlib.crc32(feature.encode("utf-8")) % VECTOR_DIMENSIONS
+
+
+def features(text):
+    """
+    (what the question asks for or None, its remaining content words).
+    """
+    kind = None
+    words = []
+    for word in _words(text):
+        if word in _QUESTION_KINDS:
+            kind = kind or _QUESTION_KINDS[word]
+        elif word in _HOW_WORDS:
+            if kind in (None, "what"):
+                kind = "how"
+        elif word not in _AUXILIARIES:
+            words.append(stem(word))
+    return kind, words
+
+
+def embed(text):
+    """
+    Unit-length hashed word and character n-gram vector of text.
+    """
+    vector = np.zeros(VECTOR_DIMENSIONS, dtype=np.float32)
+    kind, words = features(text)
+    if kind is not None:
+        vector[_bucket(f"?{kind}")] += QUESTION_KIND_WEIGHT
+    for word in words:
+        vector[_bucket(word)] += NEGATION_WEIGHT if word in _NEGATIONS else 1.0
+        padded = f" {word} "
+        # Character trigrams absorb inflections the stemmer misses.
+        for i in range(len(padded) - 2):
+            vector[_bucket(padded[i:i + 3])] += 0.2
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class ResponseCache:
+    def __init__(self, namespace, store=None, threshold=RESPONSE_CACHE_THRESHOLD,
+                 max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.key = f"respcache:{namespace}"
+        self.store = store or get_state_store()
+        self.threshold = threshold
+        # Entries per generation; this one and the previous one are served.
+        self.generation_size = max(1, max_entries // 2)
+
+        # Grown by doubling; only the first len(self._questions) rows are used.
+        self._vectors = np.zeros((16, VECTOR_DIMENSIONS), dtype=np.float32)
+        self._questions = []
+        # Per row: reply language -> (reply as shown, reply as Gemini wrote it,
+        # which is English unless the language is answered natively)
+        self._answers = []
+        # Rows before this one came from the previous generation.
+        self._previous_rows = 0
+        self._generation = 0
+        self._loaded = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+
+    def _current_generation(self):
+        return int(self.store.get(f"{self.key}:generation") or 0)
+
+    def _list_key(self, generation):
+        return f"{self.key}:{generation}"
+
+    def _add(self, question, language, reply, canonical):
+        # Caller holds the lock.
+        vector = embed(question)
+        row = self._nearest(vector)
+        if row is not None:
+            self._answers[row].setdefault(language, (reply, canonical))
+            return
+        count = len(self._questions)
+        if count == len(self._vectors):
+            grown = np.zeros((2 * count, VECTOR_DIMENSIONS), dtype=np.float32)
+            grown[:count] = self._vectors
+            self._vectors = grown
+        self._vectors[count] = vector
+        self._questions.append(question)
+        self._answers.append({language: (reply, canonical)})
+
+    def _drop_rows(self, count):
+        # Caller holds the lock. Forget the oldest count rows.
+        remaining = len(self._questions) - count
+        self._vectors[:remaining] = self._vectors[count:count + remaining]
+        del self._questions[:count], self._answers[:count]
+
+    def _nearest(self, vector):
+        # Row of the most similar cached question above the threshold, or None.
+        count = len(self._questions)
+        if not count or not vector.any():
+            return None
+        similarities = self._vectors[:count] @ vector
+        row = int(np.argmax(similarities))
+        return row if similarities[row] >= self.threshold else None
+
+    def _refresh(self):
+        # Pick up answers cached by other workers since the last look.
+        try:
+            generation = self._current_generation()
+            if generation != self._generation:
+                if generation == self._generation + 1:
+                    # The generation that filled up becomes the previous one.
+                    self._load(self._generation)
+                    self._drop_rows(self._previous_rows)
+                else:
+                    self._drop_rows(len(self._questions))
+                    self._loaded = 0
+                    if generation > 0:
+                        self._load(generation - 1)
+                self._previous_rows = len(self._questions)
+                self._generation, self._loaded = generation, 0
+            self._load(generation)
+        except Exception:
+            logger.exception("refreshing the response cache failed; using what is loaded")
+
+    def _load(self, generation):
+        # Caller holds the lock. Add the entries appended since the last load.
+        key = self._list_key(generation)
+        stored = self.store.llen(key)
+        if stored < self._loaded:
+            # The shared list expired; start over.
+            self._drop_rows(len(self._questions))
+            self._previous_rows, self._loaded = 0, 0
+        if stored > self._loaded:
+            for payload in self.store.lrange(key, self._loaded, stored - 1):
+                entry = json.loads(payload)
+                self._add(entry["question"], entry["language"], entry["reply"], entry["canonical"])
+            self._loaded = stored
+
+    def lookup(self, question, language):
+        """
+        Return (reply as shown, reply as Gemini wrote it) cached for a similar
+        question in this language, or None.
+        """
+        vector = embed(question)
+        with self._lock:
+            self._refresh()
+            row = self._nearest(vector)
+            answer = self._answers[row].get(language) if row is not None else None
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return answer
+
+    def add(self, question, language, reply, canonical):
+        """
+        Cache the answer to a first-turn question for everyone.
+        """
+        if not reply or not normalize(question):
+            return
+        entry = json.dumps({"question": question, "language": language, "reply": reply, "canonical": canonical},
+                           ensure_ascii=False)
+        with self._lock:
+            try:
+                key = self._list_key(self._current_generation())
+                length = self.store.rpush(key, entry.encode("utf-8"))
+                if length == 1:
+                    # Answers expire a fixed time after their generation
+                    # started, however busy the cache is.
+                    self.store.expire(key, RESPONSE_CACHE_TTL_DAYS * 86400)
+                if length == self.generation_size:
+                    # Exactly one worker fills the list and starts the next one.
+                    self.store.incr(f"{self.key}:generation")
+            except Exception:
+                logger.exception("storing a cached response failed")
+                return
+            self.stored += 1
+            # Loaded on the next refresh, together with anything other workers added.
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stored": self.stored,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "questions": len(self._questions),
+            }
+
+
+_response_caches = {}
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache(model, system_prompt):
+    """
+    Return the process-wide response cache for this model and system prompt.
+    """
+    namespace = hashlib.sha1(f"{model}\0{system_prompt}".encode("utf-8")).hexdigest()[:12]
+    cache = _response_caches.get(namespace)
+    if cache is None:
+        with _response_cache_lock:
+            cache = _response_caches.get(namespace)
+            if cache is None:
+                cache = _response_caches[namespace] = ResponseCache(namespace)
+    return cache
@@ -0,0 +1,341 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from conversation import estimate_tokens
+from stemming import stem
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Report Retrieval
+# ----------------------------
+# Passages from the Ombudsman's Year in Review reports, retrieved per turn and
+# sent to Gemini along with the question, so answers about the office's work
+# draw on what the office actually reported.
+#
+# The reports are indexed offline from local copies (the intranet links in the
+# sidebar need a login), into a BM25 inverted index saved as NumPy arrays:
+#
+#   python retrieval.py reports/                # every .pdf/.txt/.md in reports/
+#   python retrieval.py reports/2024.pdf reports/2023.pdf --output report_index.npz
+#
+# Reading PDFs needs pypdf (pip install pypdf); plain-text copies need nothing.
+# The app itself only needs NumPy. Without an index, turns are sent as before.
+#
+# Each posting stores its precomputed BM25 weight, so scoring a question is a
+# single np.bincount over the postings of its terms: a few milliseconds even
+# with hundreds of reports indexed.
+RETRIEVAL_ENABLED = os.getenv("OMBUDS_RETRIEVAL", "1") != "0"
+INDEX_PATH = os.getenv(
+    "OMBUDS_REPORT_INDEX", os.path.join(os.path.dirname(os.path.abspath(__file__)), "report_index.npz")
+)
+RETRIEVAL_TOP_K = int(os.getenv("OMBUDS_RETRIEVAL_TOP_K", "4"))
+# Most prompt tokens the passages of one turn may add.
+RETRIEVAL_TOKEN_BUDGET = int(os.getenv("OMBUDS_RETRIEVAL_TOKEN_BUDGET", "800"))
+# A passage's score is roughly the summed rarity of the question words it
+# contains; below this it only shares common words with the question.
+RETRIEVAL_MIN_SCORE = float(os.getenv("OMBUDS_RETRIEVAL_MIN_SCORE", "1.5"))
+
+CHUNK_TOKENS = 180
+BM25_K1 = 1.2
+BM25_B = 0.75
+INDEX_VERSION = 2
+
+PASSAGES_HEADER = (
+    "Excerpts from the Ombudsman's Year in Review reports. Use them only if they "
+    "are relevant to the question, and mention the report when you do:"
+)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_YEAR = re.compile(r"(?:19|20)\d\d")
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+
+# Words that say nothing about which passage answers a question. Unlike the
+# response cache, question words and modals go too: the reports never ask.
+_STOPWORDS = frozenset("""
+a an the and or but of to in on at for with about from by as into than then is are was were be been being am
+i me my we our us you your he she his her they them their it its this that these those there here
+what how who whom which where when why do does did can could would should will shall may might must
+not no please tell explain know want need like get some any all just also so if more most other such
+has have had
+""".split())
+
+
+class Passage:
+    def __init__(self, text, source, page, score):
+        self.text = text
+        self.source = source
+        self.page = page
+        self.score = score
+
+    def cite(self):
+        return f"[{self.source}, p. {self.page}]" if self.page else f"[{self.source}]"
+
+
+def tokenize(text):
+    """
+    Lowercased, stemmed index terms of text; questions and passages alike.
+    """
+    return [stem(word) for word in _WORD.findall(text.lower()) if len(word) > 1 and word not in _STOPWORDS]
+
+
+# ----------------------------
+# Ingestion
+# ----------------------------
+def report_name(path):
+    """
+    Display name of a report file: "Year in Review 2023" when the name has a year.
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    year = _YEAR.search(name)
+    return f"Year in Review {year.group(0)}" if year else name
+
+
+def extract_pages(path):
+    """
+    Return the text of each page of a report; plain-text files are split on
+    form feeds.
+    """
+    if path.lower().endswith(".pdf"):
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            raise RuntimeError("reading PDFs needs pypdf: pip install pypdf") from None
+        return [page.extract_text() or "" for page in PdfReader(path).pages]
+    with open(path, encoding="utf-8") as f:
+        return f.read().split("\f")
+
+
+def chunk_page(text, max_tokens=CHUNK_TOKENS):
+    """
+    Split a page into passages of whole sentences, at most max_tokens each
+    (unless one sentence is longer), overlapping by one sentence.
+    """
+    # PDF text breaks lines mid-sentence and hyphenates words across lines.
+    text = re.sub(r"-\n(?=[a-z])", "", text)
+    sentences = [s for s in _SENTENCE_END.split(" ".join(text.split())) if s]
+    passages = []
+    current = []
+    carried = 0
+    used = 0
+    for sentence in sentences:
+        cost = estimate_tokens(sentence)
+        if len(current) > carried and used + cost > max_tokens:
+            passages.append(" ".join(current))
+            current = current[-1:] if estimate_tokens(current[-1]) < max_tokens // 2 else []
+            carried = len(current)
+            used = sum(estimate_tokens(s) for s in current)
+        current.append(sentence)
+        used += cost
+    if len(current) > carried:
+        passages.append(" ".join(current))
+    return passages
+
+
+def build_index(documents, k1=BM25_K1, b=BM25_B):
+    """
+    Build the index arrays from [(source, [page text, ...]), ...].
+    """
+    sources = []
+    passage_source = []
+    passage_page = []
+    texts = []
+    for source, pages in documents:
+        sources.append(source)
+        for page_number, page in enumerate(pages, start=1):
+            for text in chunk_page(page):
+                passage_source.append(len(sources) - 1)
+                passage_page.append(page_number)
+                texts.append(text)
+
+    term_counts = [Counter(tokenize(text)) for text in texts]
+    lengths = np.array([sum(counts.values()) for counts in term_counts], dtype=np.float32)
+    average_length = float(lengths.mean()) if len(texts) and lengths.mean() else 1.0
+
+    postings = {}
+    for passage, counts in enumerate(term_counts):
+        for term, count in counts.items():
+            postings.setdefault(term, []).append((passage, count))
+
+    terms = sorted(postings)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    doc_ids = []
+    weights = []
+    for i, term in enumerate(terms):
+        entries = postings[term]
+        idf = np.log(1 + (len(texts) - len(entries) + 0.5) / (len(entries) + 0.5))
+        for passage, count in entries:
+            norm = k1 * (1 - b + b * lengths[passage] / average_length)
+            doc_ids.append(passage)
+            weights.append(idf * count * (k1 + 1) / (count + norm))
+        offsets[i + 1] = len(doc_ids)
+
+    encoded = [text.encode("utf-8") for text in texts]
+    text_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    text_offsets[1:] = np.cumsum([len(data) for data in encoded])
+    return {
+        "meta": np.array(json.dumps({
+            "version": INDEX_VERSION, "k1": k1, "b": b, "built_at": int(time.time()),
+        })),
+        "terms": np.array(terms, dtype=str),
+        "offsets": offsets,
+        "doc_ids": np.array(doc_ids, dtype=np.int32),
+        "weights": np.array(weights, dtype=np.float32),
+        "sources": np.array(sources, dtype=str),
+        "passage_source": np.array(passage_source, dtype=np.int32),
+        "passage_page": np.array(passage_page, dtype=np.int32),
+        "text_offsets": text_offsets,
+        "text": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+    }
+
+
+# ----------------------------
+# Retrieval
+# ----------------------------
+class ReportRetriever:
+    def __init__(self, arrays, top_k=RETRIEVAL_TOP_K, token_budget=RETRIEVAL_TOKEN_BUDGET,
+                 min_score=RETRIEVAL_MIN_SCORE):
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.min_score = min_score
+
+        self._term_ids = {term: i for i, term in enumerate(arrays["terms"].tolist())}
+        self._offsets = arrays["offsets"]
+        self._doc_ids = arrays["doc_ids"]
+        self._weights = arrays["weights"]
+        self._sources = arrays["sources"].tolist()
+        self._passage_source = arrays["passage_source"]
+        self._passage_page = arrays["passage_page"]
+        self._text_offsets = arrays["text_offsets"]
+        self._text = arrays["text"]
+
+    @classmethod
+    def load(cls, path=INDEX_PATH, **kwargs):
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+        version = json.loads(arrays["meta"].item())["version"]
+        if version != INDEX_VERSION:
+            raise ValueError(f"{path} is index version {version}, expected {INDEX_VERSION}; rebuild it")
+        return cls(arrays, **kwargs)
+
+    def __len__(self):
+        return len(self._passage_source)
+
+    def _passage(self, index, score):
+        start, end = self._text_offsets[index], self._text_offsets[index + 1]
+        return Passage(
+            self._text[start:end].tobytes().decode("utf-8"),
+            self._sources[self._passage_source[index]],
+            int(self._passage_page[index]),
+            float(score),
+        )
+
+    def search(self, question):
+        """
+        Return up to top_k (passage index, score) pairs, best first.
+        """
+        ids = {self._term_ids[term] for term in tokenize(question) if term in self._term_ids}
+        if not ids or not len(self):
+            return []
+        postings = [slice(self._offsets[i], self._offsets[i + 1]) for i in ids]
+        scores = np.bincount(
+            np.concatenate([self._doc_ids[s] for s in postings]),
+            weights=np.concatenate([self._weights[s] for s in postings]),
+            minlength=len(self),
+        )
+        k = min(self.top_k, len(scores))
+        best = np.argpartition(scores, -k)[-k:]
+        best = best[np.argsort(scores[best])[::-1]]
+        return [(int(i), float(scores[i])) for i in best if scores[i] >= self.min_score]
+
+    def retrieve(self, question):
+        """
+        The best passages for question that fit in the token budget.
+        """
+        passages = []
+        used = estimate_tokens(PASSAGES_HEADER)
+        for index, score in self.search(question):
+            passage = self._passage(index, score)
+            cost = estimate_tokens(passage.cite()) + estimate_tokens(passage.text) + 1
+            if used + cost > self.token_budget:
+                continue
+            passages.append(passage)
+            used += cost
+        return passages
+
+
+def format_passages(passages):
+    return PASSAGES_HEADER + "\n\n" + "\n\n".join(f"{p.cite()} {p.text}" for p in passages)
+
+
+_retriever = None
+_retriever_loaded = False
+_retriever_lock = threading.Lock()
+
+
+def get_retriever():
+    """
+    Return the process-wide retriever, or None when retrieval is disabled or
+    no index has been built.
+    """
+    global _retriever, _retriever_loaded
+    if not _retriever_loaded:
+        with _retriever_lock:
+            if not _retriever_loaded:
+                if RETRIEVAL_ENABLED and os.path.exists(INDEX_PATH):
+                    _retriever = ReportRetriever.load(INDEX_PATH)
+                    logger.info("loaded %d report passages from %s", len(_retriever), INDEX_PATH)
+                elif RETRIEVAL_ENABLED:
+                    logger.info("no report index at %s; run python retrieval.py to build one", INDEX_PATH)
+                _retriever_loaded = True
+    return _retriever
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index the Year in Review reports for retrieval.")
+    parser.add_argument("inputs", nargs="+", help="report files (.pdf, .txt, .md) or directories of them")
+    parser.add_argument("--output", default=INDEX_PATH)
+    args = parser.parse_args()
+
+    paths = []
+    for entry in args.inputs:
+        if os.path.isdir(entry):
+            paths += sorted(
+                path for pattern in ("*.pdf", "*.txt", "*.md") for path in glob.glob(os.path.join(entry, pattern))
+            )
+        else:
+            paths.append(entry)
+    if not paths:
+        parser.error("no report files found")
+
+    documents = []
+    for path in paths:
+        try:
+            pages = extract_pages(path)
+        except RuntimeError as e:
+            sys.exit(str(e))
+        documents.append((report_name(path), pages))
+        print(f"{report_name(path)}: {len(pages)} pages from {path}", file=sys.stderr)
+
+    arrays = build_index(documents)
+    with open(args.output, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    print(
+        f"wrote {args.output}: {len(arrays['passage_source'])} passages, {len(arrays['terms'])} terms, "
+        f"{os.path.getsize(args.output) // 1024} KiB",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
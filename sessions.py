@@ -0,0 +1,188 @@
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+import zlib
+
+from conversation import ConversationManager
+from message_store import Message, MessageStore
+from state_store import get_state_store
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Session Persistence
+# ----------------------------
+# Conversations are kept in a process-wide map keyed by a resumable session
+# token, not in Streamlit's per-tab session state. The token is the only key
+# to the transcript: app.py keeps it out of URLs and shows it only as an
+# opt-in resume code.
+# Every reply is written through to the shared state store (zlib-compressed,
+# append-only per message), so any worker can pick the session up; a worker
+# that already holds a session pulls in turns other workers appended.
+# Sessions idle for longer than SESSION_IDLE_TTL_SECONDS are dropped from
+# memory and rehydrated lazily on their next interaction, so memory is bounded
+# by recently active sessions however many tabs are left open.
+SESSION_IDLE_TTL_SECONDS = int(os.getenv("OMBUDS_SESSION_IDLE_TTL_SECONDS", "900"))
+# Transcripts are about workplace grievances: keep them no longer than needed
+# to resume a conversation.
+SESSION_RETENTION_DAYS = int(os.getenv("OMBUDS_SESSION_RETENTION_DAYS", "7"))
+
+
+def _pack(data):
+    return zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+
+def _unpack(blob):
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def _messages_key(token):
+    return f"session:{token}:messages"
+
+
+def _state_key(token):
+    return f"session:{token}:state"
+
+
+class Session:
+    def __init__(self, token, messages, conversation, saved=0):
+        self.token = token
+        self.messages = messages
+        self.conversation = conversation
+        self.last_seen = time.monotonic()
+        # Number of messages already written to the store.
+        self.saved = saved
+        self.lock = threading.Lock()
+
+
+class SessionManager:
+    def __init__(self, store=None, idle_ttl=SESSION_IDLE_TTL_SECONDS,
+                 retention_days=SESSION_RETENTION_DAYS, sweep=True):
+        self.store = store or get_state_store()
+        self.idle_ttl = idle_ttl
+        self.retention_seconds = retention_days * 86400
+
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+        if sweep:
+            threading.Thread(target=self._sweep_forever, name="session-sweeper", daemon=True).start()
+
+    def create(self, messages):
+        """
+        Start a new session seeded with messages (e.g. the system message).
+        """
+        session = Session(secrets.token_urlsafe(24), MessageStore(messages), ConversationManager())
+        with self._lock:
+            self._sessions[session.token] = session
+        self.save(session)
+        return session
+
+    def get(self, token):
+        """
+        Return the live session for token, rehydrating it from the store if it
+        was evicted or created by another worker. Returns None for unknown tokens.
+        """
+        if not token:
+            return None
+        with self._lock:
+            session = self._sessions.get(token)
+        if session is None:
+            session = self._load(token)
+            if session is None:
+                return None
+            with self._lock:
+                session = self._sessions.setdefault(token, session)
+        else:
+            self._refresh(session)
+        session.last_seen = time.monotonic()
+        return session
+
+    def _load(self, token):
+        state = self.store.get(_state_key(token))
+        if state is None:
+            return None
+        payloads = self.store.lrange(_messages_key(token), 0, -1)
+        messages = MessageStore(Message.from_dict(_unpack(payload)) for payload in payloads)
+        conversation = ConversationManager()
+        conversation.load_state(_unpack(state))
+        return Session(token, messages, conversation, saved=len(payloads))
+
+    def _refresh(self, session):
+        # Another worker may have answered the last turn of this session.
+        with session.lock:
+            if len(session.messages) != session.saved:
+                return
+            stored = self.store.llen(_messages_key(session.token))
+            if stored <= session.saved:
+                return
+            for payload in self.store.lrange(_messages_key(session.token), session.saved, stored - 1):
+                session.messages.append(Message.from_dict(_unpack(payload)))
+            session.saved = stored
+            state = self.store.get(_state_key(session.token))
+            if state is not None:
+                session.conversation.load_state(_unpack(state))
+
+    def save(self, session):
+        """
+        Write new messages and the summary state through to the store.
+        """
+        with session.lock:
+            new = session.messages[session.saved:]
+            messages_key, state_key = _messages_key(session.token), _state_key(session.token)
+            if new:
+                self.store.rpush(messages_key, *(_pack(msg.to_dict()) for msg in new))
+                self.store.expire(messages_key, self.retention_seconds)
+            self.store.set(state_key, _pack(session.conversation.to_state()), ttl=self.retention_seconds)
+            session.saved += len(new)
+        session.last_seen = time.monotonic()
+
+    def evict_idle(self, now=None):
+        """
+        Persist and drop sessions idle for longer than the TTL.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [s for s in self._sessions.values() if now - s.last_seen > self.idle_ttl]
+        for session in idle:
+            try:
+                self.save(session)
+            except Exception:
+                logger.exception("saving idle session failed; keeping it in memory")
+                continue
+            with self._lock:
+                if now - session.last_seen > self.idle_ttl:
+                    self._sessions.pop(session.token, None)
+        return len(idle)
+
+    def _sweep_forever(self):
+        while True:
+            time.sleep(max(self.idle_ttl / 4, 1))
+            try:
+                self.evict_idle()
+                self.store.purge_expired()
+            except Exception:
+                logger.exception("session sweep failed")
+
+    def active_count(self):
+        with self._lock:
+            return len(self._sessions)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_session_manager():
+    """
+    Return the process-wide session manager.
+    """
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = SessionManager()
+    return _manager
@@ -0,0 +1,129 @@
+import argparse
+import asyncio
+
+from state_store import MemoryStore
+
+# ----------------------------
+# Redis-Compatible Stand-in
+# ----------------------------
+# A tiny RESP2 server backed by MemoryStore, implementing just the commands
+# RedisStore sends. Lets several `streamlit run app.py` workers share state
+# on a dev box or in CI without installing Redis:
+#
+#   python state_server.py --port 6380
+#   OMBUDS_STATE_URL=redis://localhost:6380/0 streamlit run app.py --server.port 8501
+#   OMBUDS_STATE_URL=redis://localhost:6380/0 streamlit run app.py --server.port 8502
+
+
+def _encode(reply):
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, bool):
+        reply = int(reply)
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode()
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    if isinstance(reply, Exception):
+        return b"-ERR %s\r\n" % str(reply).encode()
+    return b"*%d\r\n" % len(reply) + b"".join(_encode(item) for item in reply)
+
+
+async def _read_command(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.strip().split()  # inline command, e.g. from telnet
+    args = []
+    for _ in range(int(line[1:])):
+        header = await reader.readline()
+        data = await reader.readexactly(int(header[1:]) + 2)
+        args.append(data[:-2])
+    return args
+
+
+class StateServer:
+    def __init__(self, store=None):
+        self.store = store or MemoryStore()
+        self._databases = {}
+
+    def _db(self, index):
+        if index == 0:
+            return self.store
+        return self._databases.setdefault(index, MemoryStore())
+
+    def execute(self, db, args):
+        name = args[0].decode().upper()
+        key = args[1].decode() if len(args) > 1 else None
+        if name == "PING":
+            return "PONG"
+        if name == "AUTH":
+            return "OK"
+        if name == "GET":
+            return db.get(key)
+        if name == "SET":
+            options = [arg.upper() for arg in args[3:]]
+            ttl = int(args[3 + options.index(b"EX") + 1]) if b"EX" in options else None
+            if b"NX" in options and db.get(key) is not None:
+                return None
+            db.set(key, args[2], ttl)
+            return "OK"
+        if name == "DEL":
+            db.delete(key)
+            return 1
+        if name == "INCR":
+            return db.incr(key)
+        if name == "EXPIRE":
+            db.expire(key, int(args[2]))
+            return 1
+        if name == "RPUSH":
+            return db.rpush(key, *args[2:])
+        if name == "LRANGE":
+            return db.lrange(key, int(args[2]), int(args[3]))
+        if name == "LLEN":
+            return db.llen(key)
+        return ValueError(f"unknown command '{name}'")
+
+    async def handle(self, reader, writer):
+        db = self.store
+        try:
+            while True:
+                args = await _read_command(reader)
+                if args is None:
+                    break
+                if not args:
+                    continue
+                if args[0].upper() == b"SELECT":
+                    db = self._db(int(args[1]))
+                    reply = "OK"
+                else:
+                    try:
+                        reply = self.execute(db, args)
+                    except Exception as e:
+                        reply = e
+                writer.write(_encode(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Redis-compatible stand-in for the shared state store.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    args = parser.parse_args()
+    asyncio.run(StateServer().serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
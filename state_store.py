@@ -0,0 +1,426 @@
+import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+# ----------------------------
+# Shared State Store
+# ----------------------------
+# Everything that has to be shared between Streamlit workers (conversations,
+# translation cache, context-cache names, rate-limit counters) goes through
+# this small key/value + list interface. Pick a backend with OMBUDS_STATE_URL:
+#   memory://                  one process only (tests, local experiments)
+#   sqlite:///path/to/file     default; shared by workers on the same machine
+#   redis://host:port/db       shared by workers on any machine; served by
+#                              Redis/Valkey or the stand-in in state_server.py
+# Values are bytes; callers do their own (de)serialisation.
+STATE_URL = os.getenv("OMBUDS_STATE_URL", "sqlite:///.cache/state.sqlite3")
+
+
+class StateStore:
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def incr(self, key, ttl=None):
+        """
+        Increment an integer counter and return the new value. ttl (seconds)
+        is applied when the counter is created.
+        """
+        raise NotImplementedError
+
+    def expire(self, key, ttl):
+        raise NotImplementedError
+
+    def rpush(self, key, *values):
+        raise NotImplementedError
+
+    def lrange(self, key, start, stop):
+        """
+        Inclusive range, like Redis: lrange(key, 0, -1) is the whole list.
+        """
+        raise NotImplementedError
+
+    def llen(self, key):
+        raise NotImplementedError
+
+    def purge_expired(self):
+        """
+        Drop expired keys; a no-op for backends that expire on their own.
+        """
+
+
+def _inclusive_slice(items, start, stop):
+    length = len(items)
+    if start < 0:
+        start = max(length + start, 0)
+    if stop < 0:
+        stop += length
+    return items[start:stop + 1]
+
+
+class MemoryStore(StateStore):
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.time():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return self._data.get(key)
+
+    def _set_ttl(self, key, ttl):
+        if ttl:
+            self._expires[key] = time.time() + ttl
+        else:
+            self._expires.pop(key, None)
+
+    def get(self, key):
+        with self._lock:
+            value = self._live(key)
+            return value if isinstance(value, bytes) else None
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = value
+            self._set_ttl(key, ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+
+    def incr(self, key, ttl=None):
+        with self._lock:
+            current = self._live(key)
+            value = int(current or 0) + 1
+            self._data[key] = str(value).encode()
+            if current is None:
+                self._set_ttl(key, ttl)
+            return value
+
+    def expire(self, key, ttl):
+        with self._lock:
+            if self._live(key) is not None:
+                self._set_ttl(key, ttl)
+
+    def rpush(self, key, *values):
+        with self._lock:
+            items = self._live(key)
+            if items is None:
+                items = self._data[key] = []
+            items.extend(values)
+            return len(items)
+
+    def lrange(self, key, start, stop):
+        with self._lock:
+            return list(_inclusive_slice(self._live(key) or [], start, stop))
+
+    def llen(self, key):
+        with self._lock:
+            return len(self._live(key) or [])
+
+    def purge_expired(self):
+        with self._lock:
+            for key in list(self._expires):
+                self._live(key)
+
+
+class SQLiteStore(StateStore):
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS lists ("
+            "key TEXT, idx INTEGER, value BLOB, PRIMARY KEY (key, idx))"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS expiry (key TEXT PRIMARY KEY, expires REAL)")
+        conn.commit()
+
+    # sqlite3 connections may not be shared between threads, so each thread
+    # gets its own; WAL mode lets several worker processes share the file.
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _expired(self, conn, key):
+        row = conn.execute("SELECT expires FROM expiry WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] > time.time():
+            return False
+        self._drop(conn, key)
+        return True
+
+    def _drop(self, conn, key):
+        conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+        conn.execute("DELETE FROM lists WHERE key = ?", (key,))
+        conn.execute("DELETE FROM expiry WHERE key = ?", (key,))
+
+    def _set_ttl(self, conn, key, ttl):
+        if ttl:
+            conn.execute("INSERT OR REPLACE INTO expiry VALUES (?, ?)", (key, time.time() + ttl))
+        else:
+            conn.execute("DELETE FROM expiry WHERE key = ?", (key,))
+
+    def get(self, key):
+        conn = self._connection()
+        if self._expired(conn, key):
+            return None
+        row = conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl=None):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT OR REPLACE INTO kv VALUES (?, ?)", (key, value))
+            self._set_ttl(conn, key, ttl)
+
+    def delete(self, key):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._drop(conn, key)
+
+    def incr(self, key, ttl=None):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._expired(conn, key)
+            row = conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+            value = int(row[0] if row else 0) + 1
+            conn.execute("INSERT OR REPLACE INTO kv VALUES (?, ?)", (key, str(value).encode()))
+            if row is None:
+                self._set_ttl(conn, key, ttl)
+            return value
+
+    def expire(self, key, ttl):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._set_ttl(conn, key, ttl)
+
+    def rpush(self, key, *values):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._expired(conn, key)
+            (length,) = conn.execute("SELECT COUNT(*) FROM lists WHERE key = ?", (key,)).fetchone()
+            conn.executemany(
+                "INSERT INTO lists VALUES (?, ?, ?)",
+                [(key, length + i, value) for i, value in enumerate(values)],
+            )
+            return length + len(values)
+
+    def lrange(self, key, start, stop):
+        conn = self._connection()
+        if self._expired(conn, key):
+            return []
+        if start < 0 or stop < 0:
+            length = self.llen(key)
+            start = max(length + start, 0) if start < 0 else start
+            stop = length + stop if stop < 0 else stop
+        rows = conn.execute(
+            "SELECT value FROM lists WHERE key = ? AND idx BETWEEN ? AND ? ORDER BY idx",
+            (key, start, stop),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def llen(self, key):
+        conn = self._connection()
+        if self._expired(conn, key):
+            return 0
+        (length,) = conn.execute("SELECT COUNT(*) FROM lists WHERE key = ?", (key,)).fetchone()
+        return length
+
+    def purge_expired(self):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            expired = conn.execute("SELECT key FROM expiry WHERE expires <= ?", (time.time(),)).fetchall()
+            for (key,) in expired:
+                self._drop(conn, key)
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisStore(StateStore):
+    """
+    Minimal RESP2 client with a small connection pool; enough for the commands
+    this app needs, without a redis-py dependency.
+    """
+
+    def __init__(self, host="localhost", port=6379, db=0, password=None, pool_size=8, timeout=5):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = (sock, sock.makefile("rb"))
+        if self.password:
+            self._roundtrip(conn, "AUTH", self.password)
+        if self.db:
+            self._roundtrip(conn, "SELECT", self.db)
+        return conn
+
+    @staticmethod
+    def _encode(args):
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(out)
+
+    def _read(self, reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("state store closed the connection")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RedisError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(body)
+            if count < 0:
+                return None
+            return [self._read(reader) for _ in range(count)]
+        raise RedisError(f"unexpected reply {line!r}")
+
+    def _roundtrip(self, conn, *args):
+        sock, reader = conn
+        sock.sendall(self._encode(args))
+        return self._read(reader)
+
+    def _command(self, *args):
+        try:
+            conn, pooled = self._pool.get_nowait(), True
+        except queue.Empty:
+            conn, pooled = self._connect(), False
+        try:
+            reply = self._roundtrip(conn, *args)
+        except (OSError, ConnectionError):
+            conn[0].close()
+            if not pooled:
+                raise
+            # The server may have dropped an idle pooled connection; retry once.
+            conn = self._connect()
+            reply = self._roundtrip(conn, *args)
+        except RedisError:
+            self._release(conn)
+            raise
+        self._release(conn)
+        return reply
+
+    def _release(self, conn):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn[0].close()
+
+    def get(self, key):
+        return self._command("GET", key)
+
+    def set(self, key, value, ttl=None):
+        if ttl:
+            self._command("SET", key, value, "EX", int(ttl))
+        else:
+            self._command("SET", key, value)
+
+    def delete(self, key):
+        self._command("DEL", key)
+
+    def incr(self, key, ttl=None):
+        # Create the counter with its expiry in one atomic command first; INCR
+        # keeps an existing TTL. (INCR then EXPIRE would leave a counter that
+        # never expires if the process died in between.)
+        if ttl:
+            self._command("SET", key, "0", "EX", int(ttl), "NX")
+        return self._command("INCR", key)
+
+    def expire(self, key, ttl):
+        self._command("EXPIRE", key, int(ttl))
+
+    def rpush(self, key, *values):
+        return self._command("RPUSH", key, *values)
+
+    def lrange(self, key, start, stop):
+        return self._command("LRANGE", key, start, stop)
+
+    def llen(self, key):
+        return self._command("LLEN", key)
+
+
+def open_store(url):
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return MemoryStore()
+    if parsed.scheme == "sqlite":
+        # sqlite:///relative/path or sqlite:////absolute/path
+        return SQLiteStore(url[len("sqlite:///"):])
+    if parsed.scheme == "redis":
+        db = int(parsed.path.lstrip("/") or 0)
+        return RedisStore(parsed.hostname or "localhost", parsed.port or 6379, db, parsed.password)
+    raise ValueError(f"Unsupported OMBUDS_STATE_URL: {url}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_state_store():
+    """
+    Return the process-wide state store configured by OMBUDS_STATE_URL.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = open_store(STATE_URL)
+    return _store
+
+
+def allow(store, key, limit, window_seconds):
+    """
+    Fixed-window rate limit shared by all workers: True while the counter for
+    the current window is within limit.
+    """
+    window = int(time.time() // window_seconds)
+    return store.incr(f"ratelimit:{key}:{window}", ttl=window_seconds * 2) <= limit
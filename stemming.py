@@ -0,0 +1,20 @@
+# ----------------------------
+# English Stemming
+# ----------------------------
+# A light suffix stripper shared by the response cache and report retrieval,
+# so "filing", "files" and "file" become one term in both. Each keeps its own
+# stopword list: the cache needs question words, retrieval drops them.
+
+
+def stem(word):
+    """
+    Stem of a lowercased English word.
+    """
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    for suffix in ("ations", "ation", "ings", "ing", "es", "ed", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    # "file"/"filing", "resolve"/"resolved"
+    return word[:-1] if word.endswith("e") and len(word) >= 4 else word
@@ -0,0 +1,175 @@
+import os
+import queue
+import re
+import threading
+import time
+
+# ----------------------------
+# Sentence-Pipelined Translation
+# ----------------------------
+# Gemini streams the reply in English. Instead of waiting for the whole reply
+# and translating it in one round-trip, each sentence is handed to the
+# translation worker pool as soon as it is complete, while generation carries
+# on. Translated sentences are released strictly in order.
+
+# A sentence ends at Latin/Arabic terminal punctuation followed by whitespace
+# (but not after a digit, so "1. " list markers stay intact), right after CJK
+# terminal punctuation, or at a line break (markdown lines are kept apart).
+_SENTENCE_BOUNDARY = re.compile(
+    r"(?:(?<=[^\d\s][.!?…])|(?<=[؟۔]))[ \t]+"
+    r"|(?<=[。！？；])[ \t]*"
+    r"|\n\s*"
+)
+
+# Markdown prefixes and surrounding whitespace are kept out of the translator,
+# which tends to drop or mangle them.
+_PIECE_PARTS = re.compile(r"^(\s*(?:#{1,6}\s+|[-*+]\s+|\d+[.)]\s+|>\s*)?)(.*?)(\s*)$", re.S)
+
+
+def split_sentences(text):
+    """
+    Split text into (complete sentences, unfinished remainder).
+    Each sentence keeps its trailing whitespace so joining them restores the text.
+    """
+    sentences = []
+    start = 0
+    for match in _SENTENCE_BOUNDARY.finditer(text):
+        end = match.end()
+        if end > start:
+            sentences.append(text[start:end])
+            start = end
+    return sentences, text[start:]
+
+
+def translate_piece(service, piece, target_lang):
+    prefix, core, suffix = _PIECE_PARTS.match(piece).groups()
+    if not any(ch.isalpha() for ch in core):
+        return piece
+    return prefix + service.translate(core, target_lang) + suffix
+
+
+class SentencePipeline:
+    def __init__(self, service, target_lang, executor=None):
+        self.service = service
+        self.target_lang = target_lang
+        self.executor = executor or service.executor
+
+        self._buffer = ""
+        # Translation futures in reply order, then None (done) or the exception
+        # that ended the source stream.
+        self._pending = queue.Queue()
+
+    def _submit(self, sentence):
+        self._pending.put(
+            self.executor.submit(translate_piece, self.service, sentence, self.target_lang)
+        )
+
+    def feed(self, text):
+        """
+        Add streamed text; every sentence it completes starts translating.
+        """
+        self._buffer += text
+        sentences, self._buffer = split_sentences(self._buffer)
+        for sentence in sentences:
+            self._submit(sentence)
+
+    def finish(self, error=None):
+        """
+        Flush the last partial sentence and close the pipeline, re-raising
+        error in results() once the sentences before it are out.
+        """
+        if self._buffer:
+            self._submit(self._buffer)
+            self._buffer = ""
+        self._pending.put(error)
+
+    def results(self):
+        """
+        Yield each translated sentence, in order, as soon as it is ready.
+        """
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item.result()
+
+
+def translate_stream(chunks, target_lang, service):
+    """
+    Yield the translation of a stream of text chunks, sentence by sentence.
+    The chunks are read in their own thread so a translated sentence is
+    released as soon as it is ready, not when the next chunk arrives.
+    """
+    pipeline = SentencePipeline(service, target_lang)
+
+    def read():
+        try:
+            for chunk in chunks:
+                pipeline.feed(chunk)
+        except BaseException as e:
+            pipeline.finish(e)
+        else:
+            pipeline.finish()
+
+    threading.Thread(target=read, name="sentence-reader", daemon=True).start()
+    return pipeline.results()
+
+
+# ----------------------------
+# Throttled Rendering
+# ----------------------------
+# Every placeholder.markdown() call re-sends the whole growing reply over the
+# websocket, so streamed text is coalesced and rendered at most once per frame
+# interval (or once enough new characters have arrived), with a final flush.
+RENDER_INTERVAL_SECONDS = float(os.getenv("OMBUDS_RENDER_INTERVAL_MS", "80")) / 1000
+RENDER_MIN_CHARS = int(os.getenv("OMBUDS_RENDER_MIN_CHARS", "400"))
+
+
+class ThrottledRenderer:
+    def __init__(self, placeholder, interval=RENDER_INTERVAL_SECONDS, min_chars=RENDER_MIN_CHARS,
+                 clock=time.monotonic):
+        self.placeholder = placeholder
+        self.interval = interval
+        self.min_chars = min_chars
+        self.clock = clock
+
+        self._parts = []
+        self._unrendered_chars = 0
+        self._last_render = clock()
+
+        self.deltas = 0
+        self.bytes_sent = 0
+
+    @property
+    def text(self):
+        return "".join(self._parts)
+
+    def append(self, text):
+        if not text:
+            return
+        self._parts.append(text)
+        self._unrendered_chars += len(text)
+        if (self._unrendered_chars >= self.min_chars
+                or self.clock() - self._last_render >= self.interval):
+            self.flush()
+
+    def flush(self, text=None):
+        """
+        Render the accumulated text now (or replace it with text).
+        """
+        if text is not None:
+            self._parts = [text]
+        elif not self._unrendered_chars and self.deltas:
+            return
+        body = self.text
+        self._parts = [body]
+        self.placeholder.markdown(body)
+        self.deltas += 1
+        self.bytes_sent += len(body.encode("utf-8"))
+        self._unrendered_chars = 0
+        self._last_render = self.clock()
+
+    def stats(self):
+        return {"deltas": self.deltas, "bytes_sent": self.bytes_sent}
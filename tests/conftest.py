@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Process-wide singletons read these on first use: keep tests in memory, off
+# the network and away from any local recordings or report index.
+os.environ["OMBUDS_STATE_URL"] = "memory://"
+os.environ.pop("OMBUDS_RECORD_DIR", None)
+os.environ["OMBUDS_REPORT_INDEX"] = os.path.join(os.path.dirname(__file__), "missing-report-index.npz")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
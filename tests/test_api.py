@@ -0,0 +1,131 @@
+import json
+import socket
+import threading
+import time
+
+import httpx
+import pytest
+import uvicorn
+from starlette.testclient import TestClient
+
+import assistant
+from api import app
+
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModels:
+    def __init__(self):
+        self.release = threading.Event()
+        self.release.set()
+
+    def generate_content_stream(self, model, config, contents):
+        yield Chunk("Thank you for asking. ")
+        assert self.release.wait(5)
+        yield Chunk("Here is what you can do.")
+
+
+class FakeGemini:
+    def __init__(self):
+        self.models = FakeModels()
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    client = FakeGemini()
+    monkeypatch.setattr(assistant, "get_gemini_client", lambda: client)
+    return client
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _events(response):
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+@pytest.mark.parametrize("body", [
+    [1, 2],
+    "hello",
+    {"message": ["not", "text"]},
+    {"message": "hi", "language": ["en"]},
+    {"message": "hi", "session": 42},
+    {"language": "en"},
+])
+def test_chat_rejects_malformed_bodies(client, body):
+    assert client.post("/chat", json=body).status_code == 400
+
+
+def test_chat_streams_and_saves_the_turn(client, gemini):
+    response = client.post("/chat", json={"message": "My team lead ignores my emails, what now?"})
+    events = _events(response)
+    assert [event for event, _ in events] == ["session", "delta", "delta", "done"]
+    assert events[-1][1]["reply"] == "Thank you for asking. Here is what you can do."
+
+    token = events[0][1]["session"]
+    messages = client.get("/session", headers={"X-Session-Token": token}).json()["messages"]
+    assert [m["role"] for m in messages] == ["user", "assistant"]
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Session-Token": "not-a-token"}])
+def test_reading_a_session_needs_its_token(client, headers):
+    assert client.get("/session", headers=headers).status_code == 404
+
+
+def test_turn_errors_become_error_events(client, monkeypatch):
+    def broken_turn(*args):
+        raise RuntimeError("translator unavailable")
+
+    monkeypatch.setattr("api.Turn", broken_turn)
+    events = _events(client.post("/chat", json={"message": "Hello there, I need some advice"}))
+    assert events[-1] == ("error", {"error": "translator unavailable"})
+
+
+@pytest.fixture
+def api_url():
+    # TestClient buffers whole responses, so disconnecting needs a real server.
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not server.started:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join(5)
+
+
+def test_turn_is_saved_when_the_client_disconnects(api_url, gemini):
+    gemini.models.release.clear()
+    message = {"message": "Who decides on my reassignment request?"}
+    with httpx.stream("POST", f"{api_url}/chat", json=message, timeout=5) as response:
+        lines = response.iter_lines()
+        token = json.loads(next(line for line in lines if line.startswith("data: "))[len("data: "):])["session"]
+    # The client is gone; the reply finishes anyway and the turn is kept.
+    gemini.models.release.set()
+    deadline = time.monotonic() + 5
+    while len(assistant.get_session(token).messages) < 3:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert assistant.get_session(token).messages[-1].content == "Thank you for asking. Here is what you can do."
+
+
+def test_metrics_report_session_memory(client, gemini):
+    client.post("/chat", json={"message": "Can I bring a colleague to a meeting?"})
+    memory = client.get("/metrics").json()["session_memory"]
+    assert memory["sessions"] >= 1
+    assert memory["total_bytes"] > 0
+    assert "per_session" not in memory
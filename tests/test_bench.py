@@ -0,0 +1,29 @@
+import os
+
+import bench
+
+
+def test_history_render_removes_its_offload_dir(monkeypatch):
+    created = []
+    make_store = bench.MessageStore
+
+    def store(messages, max_bytes, offload_dir):
+        created.append(offload_dir)
+        return make_store(messages, max_bytes=max_bytes, offload_dir=offload_dir)
+
+    monkeypatch.setattr(bench, "MessageStore", store)
+    with bench.prepared("history_render_window") as run:
+        run()
+        assert os.path.isdir(created[0])
+    assert not os.path.exists(created[0])
+
+
+def test_short_benchmarks_get_a_wider_threshold(monkeypatch):
+    monkeypatch.setattr(bench, "measure_relative", lambda name, repeat: (1.0, 1.4))
+    baseline = {"benchmarks": {
+        "short": {"us": 5.0, "relative": 1.0},
+        "long": {"us": 500.0, "relative": 1.0},
+    }}
+    results = {name: {"us": 1.0, "relative": 1.4} for name in ("short", "long")}
+    regressions = bench.compare(results, baseline, threshold=0.25, repeat=1)
+    assert [name for name, _, _ in regressions] == ["long"]
@@ -0,0 +1,56 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from context_cache import ContextCache
+from state_store import MemoryStore
+
+INSTRUCTION = "You are a neutral assistant. " * 200
+
+
+class BlockingCaches:
+    """
+    caches.create that waits until released, like a slow network call.
+    """
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.created = []
+
+    def create(self, model, config):
+        self.created.append(model)
+        self.started.set()
+        assert self.release.wait(5)
+        return type("Cache", (), {"name": f"cachedContents/{model}-{len(self.created)}"})()
+
+
+class FakeClient:
+    def __init__(self):
+        self.caches = BlockingCaches()
+
+
+def test_creating_a_cache_does_not_block_other_requests():
+    client = FakeClient()
+    cache = ContextCache(store=MemoryStore(), client=client, min_tokens=10)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        first = pool.submit(cache.get, "model-a", INSTRUCTION)
+        assert client.caches.started.wait(5)
+        # While model-a's upload is in flight, the same prefix is sent
+        # inline and small prompts are answered, both without waiting.
+        assert cache.get("model-a", INSTRUCTION) is None
+        assert cache.get("model-a", "short") is None
+        client.caches.release.set()
+        assert first.result(5) == "cachedContents/model-a-1"
+
+    assert cache.get("model-a", INSTRUCTION) == "cachedContents/model-a-1"
+    assert client.caches.created == ["model-a"]
+
+
+def test_entries_are_bounded():
+    client = FakeClient()
+    client.caches.release.set()
+    cache = ContextCache(store=MemoryStore(), client=client, min_tokens=10, max_entries=3)
+    for i in range(10):
+        cache.get(f"model-{i}", INSTRUCTION)
+    assert len(cache._entries) == 3
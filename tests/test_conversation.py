@@ -0,0 +1,107 @@
+import pytest
+
+from conversation import ConversationManager
+from message_store import Message
+
+
+def _history(turns, words=5):
+    messages = [Message("system", "You are the Ombudsman assistant.")]
+    for i in range(turns):
+        messages.append(Message("user", f"Question {i} " + "word " * words))
+        messages.append(Message("assistant", f"Answer {i} " + "word " * words))
+    return messages
+
+
+def _texts(contents):
+    return [[part.text for part in content.parts] for content in contents]
+
+
+class Summarizer:
+    def __init__(self, result="They asked about grievances."):
+        self.result = result
+        self.calls = []
+
+    def __call__(self, previous_summary, turns):
+        self.calls.append((previous_summary, turns))
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def _summarize(manager, messages):
+    manager.summarize_in_background(messages)
+    manager._pending.result(timeout=5)
+
+
+def test_short_history_is_sent_verbatim():
+    manager = ConversationManager(keep_turns=6, summarize=Summarizer())
+    messages = _history(2)
+    system_instruction, contents, stats = manager.build_contents(messages)
+    assert system_instruction == "You are the Ombudsman assistant."
+    assert [content.role for content in contents] == ["user", "model", "user", "model"]
+    assert stats["verbatim_messages"] == 4
+    assert stats["prompt_tokens"] == stats["full_tokens"]
+
+
+def test_turns_stay_verbatim_until_the_summary_covers_them():
+    summarizer = Summarizer()
+    manager = ConversationManager(keep_turns=2, summarize=summarizer)
+    messages = _history(5)
+
+    _, contents, _ = manager.build_contents(messages)
+    assert len(contents) == 10
+
+    _summarize(manager, messages)
+    # The three oldest turns left the window and went to the summarizer.
+    turns = summarizer.calls[0][1]
+    assert "Question 2" in turns and "Question 3" not in turns
+
+    _, contents, stats = manager.build_contents(messages)
+    assert len(contents) == 4
+    assert _texts(contents)[0][0] == "Summary of the earlier conversation: They asked about grievances."
+    assert _texts(contents)[0][1].startswith("Question 3")
+    assert stats["prompt_tokens"] < stats["full_tokens"]
+
+
+def test_the_next_summary_starts_from_the_previous_one():
+    summarizer = Summarizer()
+    manager = ConversationManager(keep_turns=2, summarize=summarizer)
+    messages = _history(4)
+    _summarize(manager, messages)
+    messages += _history(2)[1:]
+    _summarize(manager, messages)
+    previous_summary, turns = summarizer.calls[1]
+    assert previous_summary == "They asked about grievances."
+    assert "Question 2" in turns and "Question 1" not in turns
+
+
+@pytest.mark.parametrize("result", [RuntimeError("quota"), ""])
+def test_a_failed_summary_keeps_the_turns_verbatim(result):
+    manager = ConversationManager(keep_turns=2, summarize=Summarizer(result))
+    messages = _history(5)
+    _summarize(manager, messages)
+    _, contents, _ = manager.build_contents(messages)
+    assert len(contents) == 10
+    assert manager.summary == ""
+
+
+def test_token_budget_narrows_the_window_to_a_user_turn():
+    manager = ConversationManager(keep_turns=6, token_budget=60, summarize=Summarizer())
+    messages = _history(4, words=20) + [Message("user", "Question 4 " + "word " * 20)]
+    # About 28 tokens a message: the new question and the answer before it
+    # fit, but the window has to open with a question.
+    assert manager._window_start(messages) == len(messages) - 1
+    manager.token_budget = 90
+    assert manager._window_start(messages) == len(messages) - 3
+
+
+def test_state_round_trip():
+    manager = ConversationManager(keep_turns=2, summarize=Summarizer())
+    messages = _history(5)
+    _summarize(manager, messages)
+    manager.build_contents(messages)
+
+    restored = ConversationManager(keep_turns=2, summarize=Summarizer())
+    restored.load_state(manager.to_state())
+    assert restored.to_state() == manager.to_state()
+    assert _texts(restored.build_contents(messages)[1]) == _texts(manager.build_contents(messages)[1])
@@ -0,0 +1,72 @@
+import pytest
+
+from faq import FaqMatcher, Intent
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return FaqMatcher.from_file()
+
+
+def test_every_example_matches_its_intent(matcher):
+    for intent in matcher.intents:
+        for texts in intent.examples.values():
+            for text in texts:
+                assert matcher.match(text) is intent, text
+
+
+# Neither list repeats faq.json's examples or excludes.
+@pytest.mark.parametrize("text, intent", [
+    ("What are the steps to raise a formal grievance?", "grievance"),
+    ("How do I submit a complaint about my supervisor?", "grievance"),
+    ("Comment déposer une réclamation formelle ?", "grievance"),
+    ("How do I get in touch with the Ombudsman?", "access_office"),
+    ("¿Cómo puedo hablar con el Ombudsman?", "access_office"),
+    ("如何联系监察员？", "access_office"),
+    ("Can I ask for a mediator to help with my team?", "mediation"),
+    ("I feel very stressed at work, who can help?", "emotional_support"),
+    ("How can I resolve a conflict with my team lead?", "workplace_conflict"),
+])
+def test_paraphrases_are_answered(matcher, text, intent):
+    assert matcher.match(text).name == intent
+
+
+@pytest.mark.parametrize("text", [
+    # Off topic, though worded like an FAQ.
+    "What is the process for filing a travel claim?",
+    "What is the process for filing a tax return?",
+    "How can I access HR services?",
+    "How can I access IT services?",
+    "How do I receive IT support at work?",
+    "How can I resolve a visa issue?",
+    # On topic, but not what the answer covers.
+    "What is the deadline for filing a grievance?",
+    "How can I file a grievance anonymously?",
+    "Can I file a grievance anonymously?",
+    "How do I withdraw my grievance?",
+    "Can I appeal the outcome of my complaint?",
+    "I don't want to contact the Ombudsman",
+    "I do not wish to be contacted by the Ombudsman",
+    "Can I complain about the Ombudsman?",
+    "What happens if I refuse mediation?",
+    # Specific situations.
+    "My manager John keeps yelling at me",
+    "My supervisor changed my contract without telling me, and now HR says it is too late to object.",
+])
+def test_everything_else_goes_to_the_model(matcher, text):
+    assert matcher.match(text) is None
+
+
+def test_a_match_needs_a_keyword_and_no_exclude():
+    intents = [
+        Intent("leave", "How do I request leave?", {"en": ["how do I request leave"]}, {"en": "..."},
+               keywords=["leave"], excludes=["cancel"]),
+        Intent("payslip", "Where is my payslip?", {"en": ["where is my payslip"]}, {"en": "..."},
+               keywords=["payslip"]),
+    ]
+    matcher = FaqMatcher(intents, excludes=["don't want"])
+    assert matcher.match("how do I request leave").name == "leave"
+    assert matcher.match("how do I request a laptop") is None
+    assert matcher.match("how do I cancel my leave request") is None
+    assert matcher.match("where is my payslip").name == "payslip"
+    assert matcher.match("I don't want my payslip") is None
@@ -0,0 +1,35 @@
+import pytest
+
+from language_detection import detect_language, is_language
+
+
+@pytest.mark.parametrize("text, lang", [
+    ("What is the process for filing a grievance?", "en"),
+    ("I need help with my manager, he keeps shouting at me in meetings.", "en"),
+    ("Je voudrais parler avec le médiateur de mon problème", "fr"),
+    ("Comment puis-je résoudre un conflit au travail ?", "fr"),
+    ("¿Cómo puedo resolver un conflicto laboral?", "es"),
+    ("Necesito hablar con alguien sobre mi jefe", "es"),
+    ("كيف يمكنني حل نزاع في مكان العمل؟", "ar"),
+    ("如何解决职场冲突？", "zh"),
+    ("Як вирішити конфлікт з керівником?", "uk"),
+    ("Я хочу поговорити з омбудсменом", "uk"),
+])
+def test_supported_languages(text, lang):
+    assert is_language(text, lang)
+
+
+@pytest.mark.parametrize("text", [
+    # Other Latin-script languages are not the nearest supported one.
+    "Mediation ist ein Verfahren",
+    "Mediation ist ein Verfahren, bei dem beide Seiten gehört werden.",
+    "Como posso resolver um conflito no trabalho?",
+    "Come posso risolvere un conflitto sul lavoro?",
+    "Hoe kan ik een conflict op het werk oplossen?",
+    # Russian, with and without the letters Ukrainian lacks.
+    "Как мне решить конфликт с начальником",
+    "Как подать жалобу на руководителя?",
+    "Мне нужна помощь, это срочно",
+])
+def test_unsupported_languages_are_left_to_the_translator(text):
+    assert detect_language(text) == (None, 0.0)
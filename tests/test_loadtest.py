@@ -0,0 +1,21 @@
+import pytest
+
+from loadtest import percentiles
+
+
+@pytest.mark.parametrize("values, p50, p95, p99", [
+    ([7.0], 7.0, 7.0, 7.0),
+    ([1.0, 2.0], 1.0, 2.0, 2.0),
+    ([float(v) for v in range(1, 11)], 5.0, 10.0, 10.0),
+    ([float(v) for v in range(1, 21)], 10.0, 19.0, 20.0),
+    ([float(v) for v in range(100, 0, -1)], 50.0, 95.0, 99.0),
+])
+def test_nearest_rank(values, p50, p95, p99):
+    stats = percentiles(values)
+    assert (stats["p50"], stats["p95"], stats["p99"]) == (p50, p95, p99)
+    assert stats["count"] == len(values)
+    assert stats["max"] == max(values)
+
+
+def test_no_values():
+    assert percentiles([]) == {"count": 0}
@@ -0,0 +1,57 @@
+import pytest
+
+from message_store import Message, MessageStore, memory_report
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = MessageStore([Message("system", "You are the Ombudsman assistant.")],
+                         max_bytes=2000, min_in_memory=2, offload_dir=str(tmp_path))
+    for i in range(10):
+        store.append(Message("user", f"Question {i} " + "x" * 100, canonical=f"Q{i}"))
+        store.append(Message("assistant", f"Answer {i} " + "y" * 100))
+    return store
+
+
+def _contents(messages):
+    return [" ".join(msg.content.split()[:2]) for msg in messages]
+
+
+def test_old_turns_are_offloaded_but_stay_addressable(store):
+    report = store.report()
+    assert report["messages"] == 21
+    assert report["offloaded"] > 0
+    assert report["in_memory"] + report["offloaded"] == 21
+    assert store.memory_bytes() <= 2000
+    # The system message is pinned in memory, whatever its age.
+    assert store._head[0].role == "system"
+    assert store[0].content == "You are the Ombudsman assistant."
+
+
+@pytest.mark.parametrize("index", [slice(None), slice(0, 3), slice(1, 5), slice(3, 18), slice(15, None),
+                                   slice(-4, None), slice(5, 5), slice(0, 21, 2)])
+def test_slices_span_pinned_offloaded_and_in_memory_messages(store, index):
+    expected = ["You are"] + [f"{kind} {i}" for i in range(10) for kind in ("Question", "Answer")]
+    assert _contents(store[index]) == expected[index]
+
+
+def test_items_and_canonical_text_survive_offloading(store):
+    assert store[1].content.startswith("Question 0")
+    assert store[1].canonical == "Q0"
+    assert store[2].canonical == store[2].content
+    assert store[-1].content.startswith("Answer 9")
+    with pytest.raises(IndexError):
+        store[21]
+
+
+def test_a_truncated_offload_file_is_an_error(store, tmp_path):
+    (tmp_path / f"{store.session_id}.jsonl").write_text("")
+    with pytest.raises(IndexError):
+        store[1:3]
+
+
+def test_memory_report_counts_live_stores(store):
+    report = memory_report()
+    assert store.report() in report["per_session"]
+    assert report["total_bytes"] >= store.memory_bytes()
+    assert "per_session" not in memory_report(per_session=False)
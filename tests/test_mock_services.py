@@ -0,0 +1,89 @@
+import json
+
+import pytest
+from starlette.testclient import TestClient
+
+from mock_services import REPLY_TEXT, MockSettings, create_app
+
+GEMINI_STREAM = "/v1beta/models/gemini-2.5-flash:streamGenerateContent?alt=sse"
+GROQ = "/openai/v1/chat/completions"
+
+
+def _client(**settings):
+    settings = {"ttft_ms": 0.0, "tokens_per_second": 1e6, "reply_tokens": 30, "seed": 1, **settings}
+    return TestClient(create_app(MockSettings(**settings)))
+
+
+def _sse_data(response):
+    return [line[len("data: "):] for line in response.text.splitlines() if line.startswith("data: ")]
+
+
+def test_gemini_streams_the_reply_as_sse_events():
+    response = _client().post(GEMINI_STREAM, json={"contents": [{"role": "user", "parts": [{"text": "hi"}]}]})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [json.loads(data) for data in _sse_data(response)]
+    text = "".join(event["candidates"][0]["content"]["parts"][0]["text"] for event in events)
+    assert REPLY_TEXT.startswith(text.rstrip())
+    assert events[-1]["candidates"][0]["finishReason"] == "STOP"
+    assert events[-1]["usageMetadata"]["candidatesTokenCount"] == 30
+
+
+def test_gemini_generate_content_returns_the_whole_reply():
+    response = _client().post("/v1beta/models/gemini-2.5-flash:generateContent", json={"contents": []})
+    candidate = response.json()["candidates"][0]
+    assert candidate["finishReason"] == "STOP"
+    assert REPLY_TEXT.startswith(candidate["content"]["parts"][0]["text"].rstrip())
+
+
+def test_groq_answers_with_and_without_streaming():
+    client = _client()
+    body = {"model": "llama", "messages": [{"role": "user", "content": "hi"}]}
+    completion = client.post(GROQ, json=body).json()
+    text = completion["choices"][0]["message"]["content"]
+    assert REPLY_TEXT.startswith(text.rstrip())
+    assert completion["usage"]["completion_tokens"] == 30
+
+    data = _sse_data(client.post(GROQ, json={**body, "stream": True}))
+    assert data[-1] == "[DONE]"
+    chunks = [json.loads(item)["choices"][0] for item in data[:-1]]
+    assert "".join(chunk["delta"].get("content", "") for chunk in chunks) == text
+    assert chunks[-1]["finish_reason"] == "stop"
+
+
+@pytest.mark.parametrize("settings, status, gemini_status, groq_type", [
+    ({"rate_limit_rate": 1.0}, 429, "RESOURCE_EXHAUSTED", "rate_limit_exceeded"),
+    ({"error_rate": 1.0}, 500, "INTERNAL", "internal_error"),
+])
+def test_injected_failures(settings, status, gemini_status, groq_type):
+    client = _client(**settings)
+    response = client.post(GEMINI_STREAM, json={"contents": []})
+    assert response.status_code == status
+    assert response.json()["error"]["status"] == gemini_status
+
+    response = client.post(GROQ, json={"model": "llama", "messages": [], "stream": True})
+    assert response.status_code == status
+    assert response.json()["error"]["type"] == groq_type
+
+    assert client.get("/translate/m", params={"tl": "fr", "q": "hello"}).status_code == status
+
+
+def test_failure_rates_are_seeded_fractions():
+    settings = MockSettings(error_rate=0.2, rate_limit_rate=0.1, seed=7)
+    failures = [settings.failure() for _ in range(2000)]
+    rate_limited = sum(1 for failure in failures if failure and failure[0] == 429)
+    errors = sum(1 for failure in failures if failure and failure[0] == 500)
+    assert 150 < rate_limited < 250
+    assert 330 < errors < 470
+
+
+def test_translator_page_tags_the_text():
+    response = _client(translate_latency_ms=0.0).get("/translate/m", params={"sl": "en", "tl": "fr", "q": "<b>hi"})
+    assert '<div class="result-container">[fr] &lt;b&gt;hi</div>' in response.text
+
+
+def test_settings_from_the_environment(monkeypatch):
+    monkeypatch.setenv("OMBUDS_MOCK_TTFT_MS", "25")
+    monkeypatch.setenv("OMBUDS_MOCK_REPLY_TOKENS", "7")
+    settings = MockSettings.from_env(reply_tokens=9)
+    assert settings.ttft_ms == 25.0
+    assert settings.reply_tokens == 9
@@ -0,0 +1,89 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+
+from message_store import Message
+from sessions import SessionManager
+from state_server import StateServer
+from state_store import RedisStore, SQLiteStore, allow
+from translation import TranslationService
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def stand_in_port():
+    port = _free_port()
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    async def serve():
+        server = await asyncio.start_server(StateServer().handle, "127.0.0.1", port)
+        started.set()
+        async with server:
+            await server.serve_forever()
+
+    threading.Thread(target=loop.run_until_complete, args=(serve(),), daemon=True).start()
+    assert started.wait(5)
+    return port
+
+
+@pytest.fixture(params=["redis", "sqlite"])
+def worker_stores(request, tmp_path, stand_in_port):
+    # Each "worker" gets its own store client, as separate processes would.
+    if request.param == "redis":
+        return RedisStore("127.0.0.1", stand_in_port), RedisStore("127.0.0.1", stand_in_port)
+    path = str(tmp_path / "state.sqlite3")
+    return SQLiteStore(path), SQLiteStore(path)
+
+
+def test_two_workers_share_one_conversation(worker_stores):
+    store_a, store_b = worker_stores
+    worker_a = SessionManager(store=store_a, sweep=False)
+    worker_b = SessionManager(store=store_b, sweep=False)
+
+    session = worker_a.create([Message("system", "You are helpful.")])
+    session.messages.append(Message("user", "Bonjour", "Hello"))
+    session.messages.append(Message("assistant", "Salut"))
+    worker_a.save(session)
+
+    # The next request of the same user lands on the other worker.
+    resumed = worker_b.get(session.token)
+    assert [m.canonical for m in resumed.messages] == ["You are helpful.", "Hello", "Salut"]
+    resumed.messages.append(Message("user", "How do I file a grievance?"))
+    resumed.messages.append(Message("assistant", "Start by ..."))
+    worker_b.save(resumed)
+
+    # ...and back again: the first worker picks up the turn it did not serve.
+    again = worker_a.get(session.token)
+    assert again is session
+    assert len(again.messages) == 5
+    assert again.messages[-1].content == "Start by ..."
+
+    assert worker_b.get("unknown-token") is None
+
+
+def test_two_workers_share_caches_and_rate_limits(worker_stores):
+    store_a, store_b = worker_stores
+
+    TranslationService(store=store_a, workers=1).store("Hello", "fr", "Bonjour")
+    translator_b = TranslationService(store=store_b, workers=1)
+    assert translator_b.lookup("Hello", "fr") == "Bonjour"
+    assert translator_b.stats()["store_hits"] == 1
+
+    results = [allow(store, "session-1", 3, 3600) for store in (store_a, store_b, store_a, store_b)]
+    assert results == [True, True, True, False]
+
+
+def test_rate_limit_counters_expire(worker_stores):
+    store_a, store_b = worker_stores
+    assert [store_a.incr("counter", ttl=1), store_b.incr("counter", ttl=1)] == [1, 2]
+    time.sleep(1.2)
+    assert store_b.incr("counter", ttl=1) == 1
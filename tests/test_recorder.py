@@ -0,0 +1,65 @@
+import pytest
+
+import assistant
+import clients
+import recorder
+from recorder import load_fixture, scrub
+from replay import ReplayClient, ReplayModels, replay_session
+
+
+@pytest.mark.parametrize("text, scrubbed", [
+    ("My manager John Smith shouted at me.", "My manager [NAME] shouted at me."),
+    ("Mr. Okafor and Dr Lee were both there.", "[NAME] and [NAME] were both there."),
+    ("I complained to UNHCR and the HR team.", "I complained to [ORG] and the [ORG] team."),
+    ("Can the Ombudsman see me in Geneva?", "Can the Ombudsman see me in [NAME]?"),
+    ("Je travaille avec Jean-Pierre Dubois.", "Je travaille avec [NAME]."),
+    ("Write to jane.doe@example.org, says Ms Doe.", "Write to [EMAIL], says [NAME]."),
+    ("What is the process for filing a grievance?", "What is the process for filing a grievance?"),
+    ("I'm worried. Should I talk to my supervisor?", "I'm worried. Should I talk to my supervisor?"),
+])
+def test_scrub(text, scrubbed):
+    assert scrub(text) == scrubbed
+
+
+class CountingModels(ReplayModels):
+    def __init__(self):
+        super().__init__(speed=1000.0)
+        self.contents = []
+
+    def generate_content_stream(self, model, config, contents):
+        self.contents.append(len(contents))
+        return super().generate_content_stream(model, config, contents)
+
+
+@pytest.fixture
+def gemini():
+    client = ReplayClient(speed=1000.0)
+    client.models = CountingModels()
+    clients.set_gemini_client(client)
+    yield client
+    clients.set_gemini_client(None)
+
+
+def test_faq_turns_are_recorded_and_replayed(tmp_path, monkeypatch, gemini):
+    monkeypatch.setattr(recorder, "RECORD_DIR", str(tmp_path))
+    monkeypatch.setattr(assistant, "FAQ_ENABLED", True)
+    session = assistant.new_session()
+    prompts = ["How can I resolve a workplace conflict?", "And if my colleague refuses to talk to me?"]
+    for prompt in prompts:
+        # What the recorded Gemini reply plays back while recording.
+        script = {"reply": "Try asking a neutral colleague to join you.", "chunks": []}
+        monkeypatch.setattr("replay._script.turn", script, raising=False)
+        turn = assistant.Turn(session, prompt, "en")
+        list(turn)
+        turn.finish()
+
+    [path] = tmp_path.iterdir()
+    turns = load_fixture(path)
+    assert [turn["faq"] for turn in turns] == ["workplace_conflict", None]
+    assert turns[0]["reply"] == scrub(session.messages[2].content)
+    assert gemini.models.contents == [3]
+
+    # Replayed, the second question again follows the FAQ exchange.
+    results = replay_session(path.name, turns)
+    assert [result["faq"] for result in results] == ["workplace_conflict", None]
+    assert gemini.models.contents == [3, 3]
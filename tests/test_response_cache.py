@@ -0,0 +1,89 @@
+import pytest
+
+from response_cache import ResponseCache, get_response_cache
+from state_store import MemoryStore
+
+ANSWER = ("reply", "canonical")
+
+
+def _cache(*questions, **kwargs):
+    cache = ResponseCache("test", store=MemoryStore(), **kwargs)
+    for question in questions:
+        cache.add(question, "en", *ANSWER)
+    return cache
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("What is the process for filing a grievance?", "What's the process to file a grievance?"),
+    ("How do I file a grievance?", "how do i file a grievance"),
+    ("How do I file a grievance?", "How can I file a grievance?"),
+    ("how do I file a grievance", "grievance filing process?"),
+    ("Can my manager access Ombudsman services?", "Can my manager access Ombudsman services"),
+])
+def test_rewordings_share_an_answer(cached, asked):
+    assert _cache(cached).lookup(asked, "en") == ANSWER
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("What is the process for filing a grievance?", "When should I file a grievance?"),
+    ("What is the process for filing a grievance?", "Who can I file a grievance with?"),
+    ("What is the process for filing a grievance?", "Why would I file a grievance?"),
+    ("Should I mediate", "How can I mediate"),
+    ("Can my manager access Ombudsman services?", "Can I access Ombudsman services?"),
+    ("Can my manager access Ombudsman services?", "Can my manager access Ombudsman services in Geneva?"),
+    ("Is the Ombudsman confidential?", "Is the Ombudsman not confidential?"),
+    ("How do I file a grievance?", "How do I withdraw a grievance?"),
+    ("What does the Ombudsman do?", "What does the Ethics Office do?"),
+])
+def test_different_questions_do_not(cached, asked):
+    assert _cache(cached).lookup(asked, "en") is None
+
+
+def test_answers_are_per_language():
+    cache = _cache("What does the Ombudsman do?")
+    assert cache.lookup("What does the Ombudsman do?", "fr") is None
+
+
+QUESTIONS = [
+    "What does the Ombudsman do?",
+    "How can I resolve a workplace conflict?",
+    "Is mediation confidential?",
+    "Who decides on my reassignment request?",
+    "Can I bring a colleague to a meeting?",
+    "Where are the regional offices?",
+]
+
+
+def test_oldest_answers_make_room_for_new_ones():
+    cache = ResponseCache("test", store=MemoryStore(), max_entries=4)
+    for question in QUESTIONS:
+        cache.add(question, "en", *ANSWER)
+        cache.lookup(question, "en")
+    assert cache.stats()["questions"] <= 4
+    assert cache.lookup(QUESTIONS[0], "en") is None
+    assert cache.lookup(QUESTIONS[-1], "en") == ANSWER
+    # A new worker sees the same generations.
+    fresh = ResponseCache("test", store=cache.store, max_entries=4)
+    assert fresh.lookup(QUESTIONS[0], "en") is None
+    assert fresh.lookup(QUESTIONS[-1], "en") == ANSWER
+
+
+def test_expiry_is_set_when_a_list_is_created():
+    class Store(MemoryStore):
+        expired = []
+
+        def expire(self, key, ttl):
+            self.expired.append(key)
+            super().expire(key, ttl)
+
+    cache = ResponseCache("test", store=Store(), max_entries=100)
+    for question in QUESTIONS:
+        cache.add(question, "en", *ANSWER)
+    assert cache.store.expired == ["respcache:test:0"]
+
+
+def test_one_cache_per_model_and_prompt():
+    first = get_response_cache("model-a", "prompt one")
+    assert get_response_cache("model-a", "prompt one") is first
+    assert get_response_cache("model-a", "prompt two") is not first
+    assert get_response_cache("model-b", "prompt one") is not first
@@ -0,0 +1,120 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+from google.genai import types
+
+import assistant
+import clients
+from conversation import estimate_tokens
+from retrieval import (
+    PASSAGES_HEADER, ReportRetriever, build_index, extract_pages, main, report_name, tokenize,
+)
+
+REPORTS = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "fixtures", "reports", "*.txt")))
+
+
+@pytest.fixture(scope="module")
+def arrays():
+    return build_index([(report_name(path), extract_pages(path)) for path in REPORTS])
+
+
+@pytest.fixture
+def retriever(arrays):
+    # Five passages: rarity scores are far lower than in real reports.
+    return ReportRetriever(arrays, min_score=0.5)
+
+
+def test_tokenize_keeps_the_words_that_find_passages():
+    assert tokenize("What did the Ombudsman report about mediations in 2023?") == \
+        ["ombudsman", "report", "medi", "2023"]
+    assert tokenize("grievance") == tokenize("grievances")
+    assert tokenize("How should I file it?") == ["fil"]
+
+
+def test_build_index(arrays):
+    assert arrays["sources"].tolist() == ["Year in Review 2023", "Year in Review 2024"]
+    assert arrays["passage_page"].tolist() == [1, 2, 3, 1, 2]
+    assert "reassignment" in arrays["terms"].tolist()
+    assert len(arrays["offsets"]) == len(arrays["terms"]) + 1
+
+
+def test_index_round_trips_through_the_cli(tmp_path, monkeypatch):
+    output = tmp_path / "index.npz"
+    monkeypatch.setattr("sys.argv", ["retrieval.py", *REPORTS, "--output", str(output)])
+    main()
+    retriever = ReportRetriever.load(str(output), min_score=0.5)
+    assert len(retriever) == 5
+    assert retriever.retrieve("reassignment decision")[0].cite() == "[Year in Review 2024, p. 1]"
+
+
+def test_old_index_versions_are_refused(tmp_path, arrays):
+    path = tmp_path / "old.npz"
+    np.savez(path, **{**arrays, "meta": np.array('{"version": 1}')})
+    with pytest.raises(ValueError, match="rebuild"):
+        ReportRetriever.load(str(path))
+
+
+def test_best_passages_first(retriever):
+    passages = retriever.retrieve("How does mediation work?")
+    assert [p.cite() for p in passages] == ["[Year in Review 2023, p. 2]", "[Year in Review 2023, p. 1]"]
+    assert passages[0].score > passages[1].score
+    assert "voluntary" in passages[0].text
+
+
+def test_unrelated_questions_get_nothing(retriever):
+    assert retriever.retrieve("What is the weather like today?") == []
+    assert retriever.retrieve("What can I do?") == []
+
+
+def test_passages_fit_the_token_budget(arrays):
+    question = "mediation reassignment contract renewals requests"
+    everything = ReportRetriever(arrays, min_score=0, top_k=5).retrieve(question)
+    budget = estimate_tokens(PASSAGES_HEADER) + 60
+    limited = ReportRetriever(arrays, min_score=0, top_k=5, token_budget=budget).retrieve(question)
+    assert 0 < len(limited) < len(everything)
+    used = estimate_tokens(PASSAGES_HEADER) + sum(
+        estimate_tokens(p.cite()) + estimate_tokens(p.text) + 1 for p in limited
+    )
+    assert used <= budget
+
+
+class Chunk:
+    text = "Mediation is voluntary."
+
+
+class RecordingModels:
+    contents = None
+
+    def generate_content_stream(self, model, config, contents):
+        self.contents = contents
+        yield Chunk()
+
+
+class RecordingClient:
+    def __init__(self):
+        self.models = RecordingModels()
+
+
+def test_passages_go_into_the_final_user_turn(retriever, monkeypatch):
+    client = RecordingClient()
+    clients.set_gemini_client(client)
+    monkeypatch.setattr(assistant, "get_retriever", lambda: retriever)
+    monkeypatch.setattr(assistant, "FAQ_ENABLED", False)
+    try:
+        session = assistant.new_session()
+        turn = assistant.Turn(session, "How does mediation work?", "en")
+        list(turn)
+        turn.finish()
+    finally:
+        clients.set_gemini_client(None)
+
+    last = client.models.contents[-1]
+    assert last.role == "user"
+    assert [part.text for part in last.parts][1:] == ["How does mediation work?"]
+    assert last.parts[0].text.startswith(PASSAGES_HEADER)
+    assert turn.prompt_stats["report_passages"] == ["[Year in Review 2023, p. 2]", "[Year in Review 2023, p. 1]"]
+    # The history keeps the bare question.
+    assert session.messages[1].content == "How does mediation work?"
+    assert isinstance(last.parts[0], types.Part)
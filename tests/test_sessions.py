@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from message_store import Message
+from sessions import SessionManager
+from state_store import MemoryStore
+
+
+@pytest.fixture
+def manager():
+    return SessionManager(store=MemoryStore(), idle_ttl=60, sweep=False)
+
+
+def _turn(manager, session, question, answer):
+    session.messages.append(Message("user", question))
+    session.messages.append(Message("assistant", answer, canonical=f"EN: {answer}"))
+    session.conversation.summary = f"They asked: {question}"
+    manager.save(session)
+
+
+def test_unknown_tokens_have_no_session(manager):
+    assert manager.get("") is None
+    assert manager.get("not-a-token") is None
+
+
+def test_idle_sessions_are_evicted_and_rehydrated(manager):
+    session = manager.create([Message("system", "You are the Ombudsman assistant.")])
+    _turn(manager, session, "Is mediation confidential?", "Yes.")
+
+    assert manager.evict_idle(now=time.monotonic() + 61) == 1
+    assert manager.active_count() == 0
+
+    restored = manager.get(session.token)
+    assert restored is not session
+    assert [(msg.role, msg.content, msg.canonical) for msg in restored.messages] == \
+        [(msg.role, msg.content, msg.canonical) for msg in session.messages]
+    assert restored.conversation.summary == "They asked: Is mediation confidential?"
+    assert restored.saved == len(restored.messages)
+    assert manager.active_count() == 1
+
+
+def test_recently_seen_sessions_are_kept(manager):
+    session = manager.create([Message("system", "prompt")])
+    assert manager.evict_idle(now=time.monotonic() + 30) == 0
+    assert manager.get(session.token) is session
+
+
+def test_a_held_session_picks_up_turns_from_another_worker(manager):
+    other_worker = SessionManager(store=manager.store, idle_ttl=60, sweep=False)
+    session = manager.create([Message("system", "prompt")])
+    elsewhere = other_worker.get(session.token)
+
+    _turn(other_worker, elsewhere, "Who decides on my reassignment?", "The panel does.")
+    refreshed = manager.get(session.token)
+    assert refreshed is session
+    assert [msg.content for msg in session.messages[1:]] == ["Who decides on my reassignment?", "The panel does."]
+    assert session.conversation.summary == "They asked: Who decides on my reassignment?"
+
+
+def test_unsaved_turns_are_not_overwritten_by_a_refresh(manager):
+    other_worker = SessionManager(store=manager.store, idle_ttl=60, sweep=False)
+    session = manager.create([Message("system", "prompt")])
+    _turn(other_worker, other_worker.get(session.token), "First question", "First answer")
+    # This worker is mid-turn: its own message has not been saved yet.
+    session.messages.append(Message("user", "Local question"))
+    manager.get(session.token)
+    assert [msg.content for msg in session.messages[1:]] == ["Local question"]
+
+
+def test_sessions_that_cannot_be_saved_stay_in_memory(manager, monkeypatch):
+    session = manager.create([Message("system", "prompt")])
+
+    def broken_rpush(key, *values):
+        raise OSError("disk full")
+
+    session.messages.append(Message("user", "Unsaved question"))
+    monkeypatch.setattr(manager.store, "rpush", broken_rpush)
+    manager.evict_idle(now=time.monotonic() + 61)
+    assert manager.active_count() == 1
+    assert manager.get(session.token) is session
@@ -0,0 +1,79 @@
+import pytest
+
+from streaming import ThrottledRenderer
+
+
+class Placeholder:
+    def __init__(self):
+        self.rendered = []
+
+    def markdown(self, text):
+        self.rendered.append(text)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def _renderer(clock, **kwargs):
+    return ThrottledRenderer(Placeholder(), interval=0.08, min_chars=50, clock=clock, **kwargs)
+
+
+def test_chunks_within_a_frame_are_coalesced(clock):
+    renderer = _renderer(clock)
+    for word in ("Thank ", "you ", "for ", "asking."):
+        clock.now += 0.01
+        renderer.append(word)
+    assert renderer.placeholder.rendered == []
+    clock.now += 0.05
+    renderer.append(" Here")
+    assert renderer.placeholder.rendered == ["Thank you for asking. Here"]
+
+
+def test_enough_new_characters_render_before_the_frame_ends(clock):
+    renderer = _renderer(clock)
+    renderer.append("x" * 49)
+    assert renderer.deltas == 0
+    renderer.append("x")
+    assert renderer.placeholder.rendered == ["x" * 50]
+
+
+def test_flush_renders_the_rest_once(clock):
+    renderer = _renderer(clock)
+    renderer.append("Partial reply")
+    renderer.flush()
+    renderer.flush()
+    assert renderer.placeholder.rendered == ["Partial reply"]
+    assert renderer.stats() == {"deltas": 1, "bytes_sent": len("Partial reply")}
+
+
+def test_flush_with_text_replaces_the_reply(clock):
+    renderer = _renderer(clock)
+    renderer.append("Draft")
+    renderer.flush("Final reply, fully translated.")
+    assert renderer.text == "Final reply, fully translated."
+    assert renderer.placeholder.rendered == ["Final reply, fully translated."]
+
+
+def test_an_empty_reply_still_renders_once(clock):
+    renderer = _renderer(clock)
+    renderer.append("")
+    renderer.flush()
+    assert renderer.placeholder.rendered == [""]
+
+
+def test_bytes_sent_counts_every_rendered_frame(clock):
+    renderer = _renderer(clock)
+    renderer.append("é" * 50)
+    renderer.append("a" * 50)
+    # The whole reply is re-sent each time: 100 bytes, then 150.
+    assert renderer.bytes_sent == 100 + 150
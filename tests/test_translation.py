@@ -0,0 +1,162 @@
+import functools
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import uvicorn
+
+from mock_services import REPLY_TEXT, MockSettings, create_app
+from state_store import MemoryStore
+from streaming import translate_stream
+from translation import EndpointTranslator, TranslationService, make_translator
+
+
+@pytest.fixture(scope="module")
+def translator_url():
+    # The real GoogleTranslator, against mock_services.py's copy of its page.
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(MockSettings(translate_latency_ms=20.0)), host="127.0.0.1", port=port, log_level="warning",
+    ))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not server.started:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{port}/translate/m"
+    server.should_exit = True
+    thread.join(5)
+
+
+def _network_service(url):
+    return TranslationService(
+        store=MemoryStore(), workers=8, translator_factory=functools.partial(make_translator, base_url=url),
+    )
+
+
+class RecordingTranslator:
+    def __init__(self, source, target, created):
+        self.target = target
+        created.append((source, target))
+
+    def translate(self, text):
+        return f"[{self.target}] {text}"
+
+
+def test_make_translator_builds_a_fresh_configured_instance():
+    first = make_translator("en", "zh", base_url="http://127.0.0.1:1/translate/m")
+    second = make_translator("en", "zh", base_url="http://127.0.0.1:1/translate/m")
+    assert first is not second
+    assert isinstance(first, EndpointTranslator)
+    assert first._target == "zh-CN"
+    assert first._base_url == "http://127.0.0.1:1/translate/m"
+
+
+def test_service_caches_translations_not_translators():
+    created = []
+    service = TranslationService(
+        store=MemoryStore(), workers=1,
+        translator_factory=lambda source, target: RecordingTranslator(source, target, created),
+    )
+    assert service.translate("Good morning", "fr", source="en") == "[fr] Good morning"
+    assert service.translate("Good evening", "fr", source="en") == "[fr] Good evening"
+    assert service.translate("Good morning", "fr", source="en") == "[fr] Good morning"
+    assert created == [("en", "fr"), ("en", "fr")]
+
+
+def test_concurrent_translations_each_get_their_own_result(translator_url):
+    service = _network_service(translator_url)
+    texts = [f"Message number {i} about a workplace conflict" for i in range(40)]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda text: service.translate(text, "fr", source="en"), texts))
+    assert results == [f"[fr] {text}" for text in texts]
+    # ...and what was cached is right too.
+    assert [service.lookup(text, "fr", source="en") for text in texts] == results
+
+
+def test_sentence_pipeline_keeps_every_sentence_in_place(translator_url):
+    chunks = [REPLY_TEXT[i:i + 7] for i in range(0, len(REPLY_TEXT), 7)]
+    one_at_a_time = TranslationService(
+        store=MemoryStore(), workers=1,
+        translator_factory=lambda source, target: RecordingTranslator(source, target, []),
+    )
+    expected = "".join(translate_stream(iter(chunks), "fr", one_at_a_time))
+    assert "".join(translate_stream(iter(chunks), "fr", _network_service(translator_url))) == expected
+
+
+class SlowTranslator:
+    def __init__(self, target):
+        self.target = target
+
+    def translate(self, text):
+        time.sleep(0.1)
+        return f"[{self.target}] {text}"
+
+
+def test_translated_sentences_are_released_before_the_next_chunk():
+    service = TranslationService(
+        store=MemoryStore(), workers=2,
+        translator_factory=lambda source, target: SlowTranslator(target),
+    )
+
+    def slow_chunks():
+        yield "Thank you for asking. "
+        time.sleep(1.5)
+        yield "Here is what you can do."
+
+    started = time.perf_counter()
+    pieces = translate_stream(slow_chunks(), "fr", service)
+    assert next(pieces) == "[fr] Thank you for asking. "
+    # One 100 ms translation, not the 1.5 s wait for the next chunk.
+    assert time.perf_counter() - started < 0.5
+    assert list(pieces) == ["[fr] Here is what you can do."]
+
+
+def test_stream_errors_surface_after_the_sentences_before_them():
+    service = TranslationService(
+        store=MemoryStore(), workers=2,
+        translator_factory=lambda source, target: SlowTranslator(target),
+    )
+
+    def broken_chunks():
+        yield "Thank you for asking. "
+        raise RuntimeError("stream cut")
+
+    pieces = translate_stream(broken_chunks(), "fr", service)
+    assert next(pieces) == "[fr] Thank you for asking. "
+    with pytest.raises(RuntimeError, match="stream cut"):
+        next(pieces)
+
+
+def test_long_text_chunks_are_translated_in_parallel():
+    service = TranslationService(
+        store=MemoryStore(), workers=4, max_chars=100,
+        translator_factory=lambda source, target: SlowTranslator(target),
+    )
+    paragraphs = [f"Paragraph {i} describes one part of the mediation process in some detail." for i in range(4)]
+    text = "\n\n".join(paragraphs)
+
+    started = time.perf_counter()
+    translated = service.translate(text, "fr", source="en")
+    elapsed = time.perf_counter() - started
+
+    assert translated == "\n\n".join(f"[fr] {paragraph}" for paragraph in paragraphs)
+    # Four 100 ms calls one after the other would take 400 ms.
+    assert elapsed < 0.3
+
+
+def test_long_text_translated_from_a_sentence_worker_does_not_deadlock():
+    # Every sentence worker busy with a long text, each waiting for its chunks.
+    service = TranslationService(
+        store=MemoryStore(), workers=2, max_chars=100,
+        translator_factory=lambda source, target: SlowTranslator(target),
+    )
+    texts = ["\n\n".join(f"Text {n}, paragraph {i}, about a workplace grievance." * 2 for i in range(3))
+             for n in range(4)]
+    futures = [service.executor.submit(service.translate, text, "fr", "en") for text in texts]
+    assert all(future.result(timeout=10).startswith("[fr] Text") for future in futures)
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from languages import LANGUAGE_NAMES
+from ui_strings import UI_STRINGS, build_catalog, load_catalog
+
+
+class TaggingService:
+    """
+    Tags every string with its language, dropping the placeholder of "error"
+    and returning "sidebar_title" untranslated.
+    """
+
+    def translate(self, text, target, source=None):
+        if text == UI_STRINGS["sidebar_title"]:
+            return text
+        if text == UI_STRINGS["error"]:
+            return f"[{target}] An error occurred"
+        return f"[{target}] {text}"
+
+
+@pytest.fixture
+def catalog_path(tmp_path):
+    path = str(tmp_path / "ui_catalog.json")
+    build_catalog(TaggingService(), path)
+    return path
+
+
+def test_build_catalog_rejects_lost_placeholders_and_untranslated_strings(tmp_path):
+    failed = build_catalog(TaggingService(), str(tmp_path / "ui_catalog.json"))
+    others = [lang for lang in LANGUAGE_NAMES if lang != "en"]
+    assert sorted(failed) == sorted(f"{lang}:{key}" for lang in others for key in ("error", "sidebar_title"))
+
+    data = json.loads((tmp_path / "ui_catalog.json").read_text(encoding="utf-8"))
+    assert data["source"] == UI_STRINGS
+    assert data["languages"]["fr"]["report_label"] == "[fr] Year in Review {year}"
+    assert "error" not in data["languages"]["fr"]
+
+
+def test_failed_strings_fall_back_to_english(catalog_path):
+    catalog = load_catalog(catalog_path)
+    assert catalog["fr"]["error"] == UI_STRINGS["error"]
+    assert catalog["fr"]["header_title"] == f"[fr] {UI_STRINGS['header_title']}"
+    assert set(catalog["ar"]) == set(UI_STRINGS)
+
+
+def test_entries_whose_english_changed_are_ignored(catalog_path, caplog):
+    with open(catalog_path, encoding="utf-8") as f:
+        data = json.load(f)
+    data["source"]["header_title"] = "An older title"
+    with open(catalog_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+    catalog = load_catalog(catalog_path)
+    assert catalog["fr"]["header_title"] == UI_STRINGS["header_title"]
+    assert catalog["fr"]["header_welcome"] == f"[fr] {UI_STRINGS['header_welcome']}"
+    assert "header_title" in caplog.text
+
+
+def test_rebuild_translates_only_what_changed(catalog_path):
+    class CountingService(TaggingService):
+        calls = []
+
+        def translate(self, text, target, source=None):
+            self.calls.append(text)
+            return super().translate(text, target, source)
+
+    with open(catalog_path, encoding="utf-8") as f:
+        data = json.load(f)
+    data["source"]["header_title"] = "An older title"
+    with open(catalog_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+    service = CountingService()
+    build_catalog(service, catalog_path)
+    # The changed string plus the two that failed last time, per language.
+    assert set(service.calls) == {UI_STRINGS[key] for key in ("header_title", "error", "sidebar_title")}
+    assert load_catalog(catalog_path)["fr"]["header_title"] == f"[fr] {UI_STRINGS['header_title']}"
+
+
+def test_a_missing_catalog_shows_english(tmp_path):
+    catalog = load_catalog(str(tmp_path / "missing.json"))
+    assert dict(catalog["uk"]) == UI_STRINGS
@@ -0,0 +1,103 @@
+import asyncio
+import uuid
+
+import pytest
+
+import assistant
+import warm_cache
+from faq import get_faq_matcher
+
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModels:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content_stream(self, model, config, contents):
+        self.calls += 1
+        yield Chunk("Thank you for asking. ")
+        yield Chunk("Here is what you can do.")
+
+
+class FakeGemini:
+    def __init__(self):
+        self.models = FakeModels()
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    client = FakeGemini()
+    monkeypatch.setattr(assistant, "get_gemini_client", lambda: client)
+    return client
+
+
+def test_answer_generates_once_then_finds_it_cached(gemini):
+    # A question no other test has cached in this process.
+    question = f"Can a {uuid.uuid4().hex[:8]} consultant ask for mediation?"
+    assert warm_cache.answer(question, "en") == "generated"
+    assert warm_cache.answer(question, "en") == "cached"
+    assert gemini.models.calls == 1
+
+
+def test_answer_reports_faq_questions(gemini, monkeypatch):
+    monkeypatch.setattr(assistant, "FAQ_ENABLED", True)
+    intent = get_faq_matcher().intents[0]
+    assert warm_cache.answer(intent.examples["en"][0], "en") == "faq"
+    assert gemini.models.calls == 0
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    delays = []
+
+    async def sleep(seconds):
+        delays.append(seconds)
+
+    monkeypatch.setattr(warm_cache.asyncio, "sleep", sleep)
+    return delays
+
+
+def test_warm_counts_each_outcome_and_retries_failures(monkeypatch, no_backoff):
+    attempts = {}
+
+    def answer(question, language):
+        attempts[question, language] = attempts.get((question, language), 0) + 1
+        if question == "flaky" and attempts[question, language] < 3:
+            raise RuntimeError("429 rate limited")
+        if question == "broken":
+            raise RuntimeError("translator down")
+        return {"new": "generated", "known": "cached", "faq": "faq", "flaky": "generated"}[question]
+
+    monkeypatch.setattr(warm_cache, "answer", answer)
+    counts, failures = asyncio.run(
+        warm_cache.warm(["new", "known", "faq", "flaky", "broken"], ["en", "fr"], concurrency=2, retries=2)
+    )
+
+    assert counts == {"generated": 4, "cached": 2, "faq": 2, "failed": 2}
+    assert sorted(failures) == ["[en] broken: translator down", "[fr] broken: translator down"]
+    assert attempts["flaky", "en"] == 3
+    assert attempts["broken", "fr"] == 3
+    # Exponential backoff between attempts, none after the last one.
+    assert sorted(no_backoff) == [1, 1, 1, 1, 2, 2, 2, 2]
+
+
+def test_main_exits_with_an_error_when_something_failed(monkeypatch, no_backoff, tmp_path, capsys):
+    questions = tmp_path / "questions.txt"
+    questions.write_text("# curated\nWhat does the Ombudsman do?\n\nbroken\n", encoding="utf-8")
+
+    def answer(question, language):
+        if question == "broken":
+            raise RuntimeError("translator down")
+        return "generated"
+
+    monkeypatch.setattr(warm_cache, "answer", answer)
+    monkeypatch.setattr("sys.argv", ["warm_cache.py", "--questions", str(questions), "--no-quick-questions",
+                                     "--languages", "en", "--retries", "0"])
+    with pytest.raises(SystemExit) as exit_info:
+        warm_cache.main()
+    assert exit_info.value.code == 1
+    assert "1 generated, 0 already cached, 0 answered from faq.json, 1 failed" in capsys.readouterr().err
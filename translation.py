@@ -0,0 +1,277 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from deep_translator import GoogleTranslator
+
+from language_detection import is_language
+from state_store import get_state_store
+from streaming import split_sentences
+
+# ----------------------------
+# Translation Service
+# ----------------------------
+# Translations are looked up in three places, cheapest first:
+#   1. an in-process LRU shared by every session,
+#   2. the shared state store (SQLite in WAL mode by default, or Redis), which
+#      survives restarts and is shared by every server process,
+#   3. the network translator. A GoogleTranslator keeps each request's
+#      parameters on the instance, so every call gets a fresh one (cheap: no
+#      I/O happens until translate()); only the configuration is shared.
+# Text that is already in the target language is returned before any of them.
+TRANSLATION_CACHE_TTL_DAYS = int(os.getenv("OMBUDS_TRANSLATION_CACHE_TTL_DAYS", "90"))
+TRANSLATION_MEMORY_SIZE = int(os.getenv("OMBUDS_TRANSLATION_MEMORY_SIZE", "2048"))
+TRANSLATION_WORKERS = int(os.getenv("OMBUDS_TRANSLATION_WORKERS", "8"))
+# GoogleTranslator rejects requests above 5000 characters.
+TRANSLATION_MAX_CHARS = int(os.getenv("OMBUDS_TRANSLATION_MAX_CHARS", "4500"))
+# Alternative translator endpoint serving the same page, e.g. mock_services.py.
+TRANSLATOR_URL = os.getenv("OMBUDS_TRANSLATOR_URL")
+# App language codes the translator knows under another name.
+TRANSLATOR_CODES = {"zh": "zh-CN"}
+
+
+class EndpointTranslator(GoogleTranslator):
+    """
+    GoogleTranslator against another endpoint serving the same page.
+    """
+
+    def __init__(self, source, target, base_url):
+        super().__init__(source=source, target=target)
+        # GoogleTranslator hard-codes its endpoint; subclasses may replace it.
+        self._base_url = base_url
+
+
+def make_translator(source, target, base_url=TRANSLATOR_URL):
+    """
+    Return a new translator for one call. Instances must not be shared
+    between threads.
+    """
+    source = TRANSLATOR_CODES.get(source, source)
+    target = TRANSLATOR_CODES.get(target, target)
+    if base_url:
+        return EndpointTranslator(source, target, base_url)
+    return GoogleTranslator(source=source, target=target)
+
+
+def cache_key(text, source, target):
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    return f"{digest}:{source}:{target}"
+
+
+def _hard_split(text, max_chars):
+    pieces = []
+    while len(text) > max_chars:
+        cut = text.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(text[:cut])
+        text = text[cut:]
+    pieces.append(text)
+    return pieces
+
+
+def split_for_translation(text, max_chars=TRANSLATION_MAX_CHARS):
+    """
+    Split text into chunks of at most max_chars, breaking on paragraph, then
+    sentence, then word boundaries. Joining the chunks restores the text.
+    """
+    units = []
+    for paragraph in re.split(r"(?<=\n\n)", text):
+        if len(paragraph) <= max_chars:
+            units.append(paragraph)
+            continue
+        sentences, rest = split_sentences(paragraph)
+        for sentence in sentences + [rest]:
+            units.extend(_hard_split(sentence, max_chars))
+
+    chunks = []
+    current = ""
+    for unit in units:
+        if current and len(current) + len(unit) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += unit
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class TranslationService:
+    def __init__(self, store=None, memory_size=TRANSLATION_MEMORY_SIZE,
+                 workers=TRANSLATION_WORKERS, max_chars=TRANSLATION_MAX_CHARS, translator_factory=make_translator):
+        self.shared = store or get_state_store()
+        # (source, target) -> a translator with a translate(text) method,
+        # called once per network translation.
+        self.translator_factory = translator_factory
+        self.memory_size = memory_size
+        self.max_chars = max_chars
+        # Shared by every session for concurrent sentence translation.
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate")
+        # Chunks of long texts get their own pool: a translate() running on
+        # self.executor waits for its chunks, and chunk tasks never wait on
+        # anything, so neither pool can starve the other.
+        self.chunk_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate-chunk")
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.skipped = 0
+
+    def _memory_get(self, key):
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+            return value
+
+    def _memory_put(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _store_get(self, key):
+        try:
+            value = self.shared.get(f"tr:{key}")
+        except Exception:
+            return None  # the shared cache is best-effort
+        return value.decode("utf-8") if value is not None else None
+
+    def _store_put(self, key, value):
+        try:
+            self.shared.set(f"tr:{key}", value.encode("utf-8"), ttl=TRANSLATION_CACHE_TTL_DAYS * 86400)
+        except Exception:
+            pass  # the cache is best-effort; the translation itself succeeded
+
+    def lookup(self, text, target, source="auto"):
+        """
+        Return a cached translation, or None. Never touches the network.
+        """
+        key = cache_key(text, source, target)
+
+        value = self._memory_get(key)
+        if value is not None:
+            with self._lock:
+                self.memory_hits += 1
+            return value
+
+        value = self._store_get(key)
+        if value is not None:
+            with self._lock:
+                self.store_hits += 1
+            self._memory_put(key, value)
+            return value
+
+        return None
+
+    def store(self, text, target, translated, source="auto"):
+        key = cache_key(text, source, target)
+        self._memory_put(key, translated)
+        self._store_put(key, translated)
+
+    def translate(self, text, target, source="auto"):
+        """
+        Translate text, falling back to the original text if the translator fails.
+        """
+        if not text or not text.strip():
+            return text
+
+        if source == "auto" and is_language(text, target):
+            with self._lock:
+                self.skipped += 1
+            return text
+
+        cached = self.lookup(text, target, source)
+        if cached is not None:
+            return cached
+
+        if len(text) > self.max_chars:
+            translated = self._translate_chunks(text, target, source)
+        else:
+            translated = self._fetch(text, target, source)
+
+        if translated is None:
+            return text  # fallback, not cached so it is retried next time
+        self.store(text, target, translated, source)
+        return translated
+
+    def _fetch(self, text, target, source):
+        with self._lock:
+            self.misses += 1
+        try:
+            return self.translator_factory(source, target).translate(text)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            return None
+
+    def _translate_chunk(self, chunk, target, source):
+        # The translator strips surrounding whitespace, which would glue
+        # paragraphs together on reassembly.
+        core = chunk.strip()
+        if not core:
+            return chunk
+        translated = self.lookup(core, target, source)
+        if translated is None:
+            translated = self._fetch(core, target, source)
+            if translated is None:
+                return None
+            self.store(core, target, translated, source)
+        start = chunk.index(core)
+        return chunk[:start] + translated + chunk[start + len(core):]
+
+    def _translate_chunks(self, text, target, source):
+        chunks = split_for_translation(text, self.max_chars)
+        results = list(self.chunk_executor.map(
+            lambda chunk: self._translate_chunk(chunk, target, source), chunks
+        ))
+        if any(result is None for result in results):
+            return None
+        return "".join(results)
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.store_hits
+            total = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "store_hits": self.store_hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "skipped": self.skipped,
+                "hit_rate": hits / total if total else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_translation_service():
+    """
+    Return the process-wide translation service.
+    """
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = TranslationService()
+    return _service
+
+
+def set_translation_service(service):
+    """
+    Replace the process-wide translation service, e.g. with the stand-in replay.py uses.
+    """
+    global _service
+    with _service_lock:
+        _service = service
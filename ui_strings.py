@@ -0,0 +1,175 @@
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from types import MappingProxyType
+
+from assistant import QUICK_QUESTIONS
+from languages import LANGUAGE_NAMES
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# UI String Catalog
+# ----------------------------
+# Every static string on the page, in every supported language, from a
+# checked-in catalog (ui_catalog.json) loaded once per process. Switching
+# language re-renders the page from memory, with no translation calls.
+#
+# After adding or changing a string below, refresh the catalog through the
+# translator backend and review the result before committing it:
+#
+#   python ui_strings.py              # translate missing or changed strings
+#   python ui_strings.py --rebuild    # re-translate everything
+#
+# The catalog remembers the English text each entry was translated from, so
+# an entry whose English has changed since is ignored (English is shown)
+# until the catalog is rebuilt.
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ui_catalog.json")
+
+UI_STRINGS = {
+    "language_prompt": "Select your preferred language:",
+    "sidebar_title": "Ombudsman and Mediator",
+    "sidebar_intro": "Your neutral guide for:",
+    "sidebar_conflict": "Conflict resolution",
+    "sidebar_fairness": "Workplace fairness",
+    "sidebar_support": "Support and guidance",
+    "sidebar_website": "Visit UNHCR Website",
+    "sidebar_contact": "Contact Office of Ombudsman and Mediator",
+    "reports_title": "Annual Reports and Publications",
+    "reports_intro": "Download the latest reports to learn more about our work:",
+    "report_label": "Year in Review {year}",
+    "header_title": "Ombuds AI Support Assistant",
+    "header_welcome": (
+        "Welcome! I'm here to help prevent, reduce, and resolve workplace grievances "
+        "within the UNHCR community."
+    ),
+    "quick_questions": "Quick Questions:",
+    "load_earlier": "Load earlier messages ({hidden} hidden)",
+    "chat_placeholder": "How can I help you today?",
+    "rate_limited": "You are sending messages very quickly. Please wait a moment and try again.",
+    "error": "An error occurred: {error}",
+    "resume_title": "Resume this conversation later",
+    "resume_intro": (
+        "Anyone with this code can read this conversation. Keep it private; paste it below "
+        "in a new tab to continue where you left off."
+    ),
+    "resume_input": "Resume code",
+    "resume_unknown": "That resume code is unknown or has expired.",
+    # The quick questions, keyed by their English text.
+    **{f"question:{question}": question for question in QUICK_QUESTIONS.values()},
+}
+
+_PLACEHOLDER = re.compile(r"\{\w+\}")
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def _read(path):
+    if not os.path.exists(path):
+        return {"source": {}, "languages": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_catalog(path=CATALOG_PATH):
+    """
+    Return {language: read-only {key: text}} covering every key in UI_STRINGS.
+    """
+    data = _read(path)
+    source = data.get("source", {})
+    stale = sorted(key for key, english in UI_STRINGS.items() if source.get(key) != english)
+    if stale:
+        logger.warning("UI catalog is out of date for %s; showing English. Run python ui_strings.py.", stale)
+
+    catalog = {"en": MappingProxyType(dict(UI_STRINGS))}
+    for lang in LANGUAGE_NAMES:
+        if lang == "en":
+            continue
+        translated = data.get("languages", {}).get(lang, {})
+        catalog[lang] = MappingProxyType({
+            key: translated[key] if key in translated and key not in stale else english
+            for key, english in UI_STRINGS.items()
+        })
+    return MappingProxyType(catalog)
+
+
+def get_catalog():
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = load_catalog()
+    return _catalog
+
+
+def ui_text(lang, key, **values):
+    strings = get_catalog().get(lang) or get_catalog()["en"]
+    return strings[key].format(**values) if values else strings[key]
+
+
+def quick_question(lang, question):
+    """
+    The quick question (given in English) as shown in lang.
+    """
+    return ui_text(lang, f"question:{question}")
+
+
+# ----------------------------
+# Catalog Build
+# ----------------------------
+def build_catalog(service, path=CATALOG_PATH, rebuild=False):
+    """
+    Translate missing or changed strings and write the catalog.
+    Returns the keys that could not be translated.
+    """
+    data = _read(path)
+    source = data.get("source", {})
+    failed = []
+    languages = {}
+    for lang in LANGUAGE_NAMES:
+        if lang == "en":
+            continue
+        previous = data.get("languages", {}).get(lang, {})
+        entries = {}
+        for key, english in UI_STRINGS.items():
+            if not rebuild and key in previous and source.get(key) == english:
+                entries[key] = previous[key]
+                continue
+            translated = service.translate(english, lang, source="en")
+            # Placeholders have to survive translation untouched.
+            if translated == english or sorted(_PLACEHOLDER.findall(translated)) != sorted(
+                    _PLACEHOLDER.findall(english)):
+                failed.append(f"{lang}:{key}")
+                continue
+            entries[key] = translated
+        languages[lang] = entries
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"source": UI_STRINGS, "languages": languages}, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the translated UI string catalog.")
+    parser.add_argument("--rebuild", action="store_true", help="re-translate every string, not just new ones")
+    parser.add_argument("--output", default=CATALOG_PATH)
+    args = parser.parse_args()
+
+    from translation import get_translation_service
+
+    failed = build_catalog(get_translation_service(), args.output, rebuild=args.rebuild)
+    for entry in failed:
+        print(f"not translated: {entry}", file=sys.stderr)
+    print(f"wrote {args.output}", file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import argparse
+import asyncio
+import os
+import secrets
+import sys
+import time
+
+# ----------------------------
+# Response Cache Warming
+# ----------------------------
+# Pre-generates answers to the quick questions and the curated questions in
+# faq_questions.txt, in every supported language, through the same pipeline
+# as live traffic (generation, translation where configured), and stores them
+# in the shared response cache. Run at deploy time so the first person to ask
+# one of them gets an instant answer:
+#
+#   python warm_cache.py --concurrency 4
+#   python warm_cache.py --questions extra.txt --languages ar,uk
+#
+# Questions already cached for a language are skipped, so re-running is cheap,
+# and questions answered from faq.json need no cached answer at all.
+# Warming sessions are never saved and never recorded.
+os.environ.pop("OMBUDS_RECORD_DIR", None)
+
+from assistant import QUICK_QUESTIONS, SYSTEM_PROMPT, Turn  # noqa: E402
+from conversation import ConversationManager  # noqa: E402
+from languages import LANGUAGE_NAMES  # noqa: E402
+from message_store import Message, MessageStore  # noqa: E402
+from response_cache import RESPONSE_CACHE_ENABLED  # noqa: E402
+from sessions import Session  # noqa: E402
+
+DEFAULT_QUESTIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "faq_questions.txt")
+
+
+def read_questions(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def answer(question, language):
+    """
+    Run one first-turn question through the pipeline; return "generated",
+    "cached" (already in the response cache) or "faq" (a curated answer).
+    """
+    session = Session(
+        secrets.token_urlsafe(24),
+        MessageStore([Message("system", SYSTEM_PROMPT)]),
+        ConversationManager(),
+    )
+    turn = Turn(session, question, language)
+    for _ in turn:
+        pass
+    if not turn.reply:
+        raise RuntimeError("empty reply")
+    if turn.faq is not None:
+        return "faq"
+    return "cached" if turn.cache_hit else "generated"
+
+
+async def warm(questions, languages, concurrency, retries):
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {"generated": 0, "cached": 0, "faq": 0, "failed": 0}
+    failures = []
+
+    async def warm_one(question, language):
+        async with semaphore:
+            for attempt in range(retries + 1):
+                try:
+                    status = await asyncio.to_thread(answer, question, language)
+                    break
+                except Exception as e:
+                    if attempt == retries:
+                        counts["failed"] += 1
+                        failures.append(f"[{language}] {question}: {e}")
+                        return
+                    # Back off before retrying, e.g. after a rate limit.
+                    await asyncio.sleep(2 ** attempt)
+        counts[status] += 1
+        print(f"[{language}] {status:<9} {question}", file=sys.stderr)
+
+    await asyncio.gather(*(warm_one(q, lang) for q in questions for lang in languages))
+    return counts, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate cached answers for frequent questions.")
+    parser.add_argument("--questions", default=DEFAULT_QUESTIONS_PATH,
+                        help="curated question file, one per line (default: faq_questions.txt)")
+    parser.add_argument("--no-quick-questions", action="store_true", help="skip the quick-question buttons")
+    parser.add_argument("--languages", default=",".join(LANGUAGE_NAMES),
+                        help="comma-separated language codes (default: all supported)")
+    parser.add_argument("--concurrency", type=int, default=4, help="answers generated at the same time")
+    parser.add_argument("--retries", type=int, default=2)
+    args = parser.parse_args()
+
+    if not RESPONSE_CACHE_ENABLED:
+        sys.exit("the response cache is disabled (OMBUDS_RESPONSE_CACHE=0)")
+    languages = [code.strip() for code in args.languages.split(",") if code.strip()]
+    unknown = [code for code in languages if code not in LANGUAGE_NAMES]
+    if unknown:
+        parser.error(f"unsupported language(s): {', '.join(unknown)}")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    questions = [] if args.no_quick_questions else list(QUICK_QUESTIONS.values())
+    if args.questions:
+        questions += read_questions(args.questions)
+    questions = list(dict.fromkeys(questions))
+
+    started = time.perf_counter()
+    counts, failures = asyncio.run(warm(questions, languages, args.concurrency, args.retries))
+    for failure in failures:
+        print(f"FAILED {failure}", file=sys.stderr)
+    print(
+        f"{len(questions)} questions x {len(languages)} languages in {time.perf_counter() - started:.1f}s: "
+        f"{counts['generated']} generated, {counts['cached']} already cached, "
+        f"{counts['faq']} answered from faq.json, {counts['failed']} failed",
+        file=sys.stderr,
+    )
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()